@@ -0,0 +1,30 @@
+import time
+
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from airport.metrics import JWT_AUTHENTICATION_DURATION, JWT_AUTHENTICATIONS
+
+
+class MeteredJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that counts and times authentications for /metrics:
+    success, failed (invalid/expired token, unknown user) or anonymous
+    (no token).
+    """
+
+    def authenticate(self, request):
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            result = super().authenticate(request)
+            outcome = "anonymous" if result is None else "success"
+            return result
+        finally:
+            JWT_AUTHENTICATIONS.inc(outcome=outcome)
+            JWT_AUTHENTICATION_DURATION.observe(time.perf_counter() - started)
+
+
+class MeteredJWTScheme(SimpleJWTScheme):
+    # same "Bearer" security scheme in the OpenAPI schema as JWTAuthentication
+    target_class = MeteredJWTAuthentication
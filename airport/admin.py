@@ -7,8 +7,10 @@ from airport.models import (
     Airplane,
     Crew,
     Flight,
+    FlightSchedule,
     Order,
     Ticket,
+    SeatHold,
 )
 
 
@@ -46,9 +48,28 @@ class CrewAdmin(admin.ModelAdmin):
 
 @admin.register(Flight)
 class FlightAdmin(admin.ModelAdmin):
-    list_display = ("id", "route", "airplane", "departure_time", "arrival_time")
+    list_display = ("id", "route", "airplane", "departure_time", "arrival_time", "tickets_sold")
+    readonly_fields = ("tickets_sold",)
     list_filter = ("route__source", "route__destination", "airplane")
     search_fields = ("route__source__name", "route__destination__name")
+    raw_id_fields = ("schedule",)
+
+
+@admin.register(FlightSchedule)
+class FlightScheduleAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "route",
+        "airplane",
+        "weekdays",
+        "departure_time",
+        "valid_from",
+        "valid_until",
+        "materialized_until",
+    )
+    readonly_fields = ("materialized_until",)
+    list_filter = ("route__source", "route__destination")
+    filter_horizontal = ("crew",)
 
 
 @admin.register(Order)
@@ -61,3 +82,10 @@ class OrderAdmin(admin.ModelAdmin):
 class TicketAdmin(admin.ModelAdmin):
     list_display = ("id", "flight", "order", "row", "seat")
     list_filter = ("flight",)
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("id", "token", "flight", "user", "row", "seat", "expires_at")
+    list_filter = ("flight",)
+    search_fields = ("token", "user__username")
@@ -0,0 +1,142 @@
+"""
+Async read endpoints for flight search and seat availability.
+
+Plain Django async views (DRF views are sync only): under ASGI a request
+waiting for the database or long-polling for a seat map change does not
+hold a worker thread. They also work under WSGI, where Django runs each one
+in its own event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (
+    Http404,
+    HttpResponseNotAllowed,
+    HttpResponseNotModified,
+    JsonResponse,
+)
+from django.utils.http import parse_etags
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+
+from airport.filters import FlightFilter
+from airport.models import Flight
+from airport.pagination import FlightPagination
+from airport.serializers import FLIGHT_LIST_VALUES, flight_list_data
+from airport.services import annotate_availability, get_seat_map
+from airport.views import FlightViewSet
+
+aget_seat_map = sync_to_async(get_seat_map)
+
+
+def _search_queryset(request):
+    """
+    The FlightViewSet list queryset with the FlightFilter params, ?search= and
+    ?ordering= applied, or the filter errors. Sync: validating choice filters
+    queries the database.
+    """
+    filterset = FlightFilter(
+        request.GET, queryset=annotate_availability(Flight.objects.all())
+    )
+    if not filterset.is_valid():
+        return None, {
+            field: [error["message"] for error in errors]
+            for field, errors in filterset.errors.get_json_data().items()
+        }
+    # the search fields, ordering fields and keyset ordering of the list
+    request = Request(request)
+    queryset = SearchFilter().filter_queryset(request, filterset.qs, FlightViewSet)
+    ordering = FlightPagination().get_ordering(request, queryset, FlightViewSet)
+    return queryset.order_by(*ordering), None
+
+
+def _bounded(request, name: str, default, maximum, cast):
+    try:
+        value = cast(request.GET.get(name, default))
+    except ValueError:
+        return None
+    # float("nan") compares false with everything: min/max would keep it
+    if not math.isfinite(value):
+        return None
+    return min(max(value, 0), maximum)
+
+
+async def flight_search(request):
+    """
+    GET /api/async/flights/?limit=50 plus any GET /api/flights/ filter,
+    ?search= and ?ordering=.
+
+    Returns the total count and the first `limit` flights, each in the same
+    representation as the flight list.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    limit = _bounded(
+        request, "limit", FlightPagination.page_size, FlightPagination.max_page_size, int
+    )
+    if not limit:
+        message = f"Must be an integer between 1 and {FlightPagination.max_page_size}."
+        return JsonResponse({"limit": [message]}, status=400)
+
+    queryset, errors = await sync_to_async(_search_queryset)(request)
+    if errors is not None:
+        return JsonResponse(errors, status=400)
+
+    count = await queryset.acount()
+    rows = [row async for row in queryset.values(*FLIGHT_LIST_VALUES)[:limit].aiterator()]
+    return JsonResponse({"count": count, "results": flight_list_data(rows)})
+
+
+def seat_map_etag(seat_map: dict) -> str:
+    digest = hashlib.md5(
+        json.dumps(seat_map, sort_keys=True).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+async def flight_seats(request, pk: int):
+    """
+    GET /api/async/flights/<id>/seats/ - the seat map of /api/flights/<id>/seats/.
+
+    Long polling: with If-None-Match set to the ETag of a previous response
+    and ?wait=<seconds> (at most AIRPORT_LONG_POLL_SECONDS), the request
+    waits until the map changes and answers 304 if it did not.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    wait = _bounded(
+        request, "wait", 0, getattr(settings, "AIRPORT_LONG_POLL_SECONDS", 30), float
+    )
+    if wait is None:
+        return JsonResponse({"wait": ["A valid number is required."]}, status=400)
+
+    try:
+        flight = await Flight.objects.select_related("airplane").aget(pk=pk)
+    except Flight.DoesNotExist:
+        raise Http404("No Flight matches the given query.")
+
+    known = parse_etags(request.headers.get("If-None-Match", ""))
+    interval = getattr(settings, "AIRPORT_LONG_POLL_INTERVAL", 1.0)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        # cached, so a poll is a cache read unless the map changed
+        seat_map = await aget_seat_map(flight)
+        etag = seat_map_etag(seat_map)
+        if etag not in known:
+            return JsonResponse(seat_map, headers={"ETag": etag})
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+        await asyncio.sleep(min(interval, remaining))
@@ -0,0 +1,322 @@
+"""
+List-accepting create and partial update for the admin viewsets.
+
+BulkListSerializer validates the whole payload before writing anything: the
+related objects of all items are read with one query per model (see
+PreloadedPrimaryKeyRelatedField), unique-together checks and the child's
+validate_items() hook run set-wise, and errors are reported as a list aligned
+with the input items. The rows are then
+written with batched bulk_create/bulk_update in a single transaction.
+
+bulk_create/bulk_update send no model signals, BulkModelMixin.bulk_saved is
+where the viewsets do what airport.signals would have done.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Model, prefetch_related_objects
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils import model_meta
+from rest_framework.validators import UniqueTogetherValidator
+
+
+def _preload_key(queryset) -> tuple:
+    # fields with the same model and the same filters share one query
+    return queryset.model, str(queryset.query)
+
+
+def _pk_value(value):
+    return value.pk if isinstance(value, Model) else value
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that takes the object from the ones preloaded by
+    BulkListSerializer instead of querying for each item; behaves like the
+    parent class everywhere else.
+    """
+
+    def to_internal_value(self, data):
+        queryset = self.get_queryset()
+        objects = self.context.get("preloaded_objects", {}).get(_preload_key(queryset))
+        if objects is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = queryset.model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in objects:
+            self.fail("does_not_exist", pk_value=data)
+        return objects[pk]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True serializer of a ModelSerializer for bulk writes.
+
+    Created with data only it inserts the items; created with a queryset as
+    instance (and partial=True) every item must carry the "id" of an object
+    of that queryset, which it partially updates.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # checked for the whole payload at once by validate_unique_together()
+        validators = self.child.validators
+        self.unique_together = [v for v in validators if isinstance(v, UniqueTogetherValidator)]
+        self.child.validators = [v for v in validators if v not in self.unique_together]
+        self._instances: list[Model] = []
+
+    @property
+    def model(self) -> type[Model]:
+        return self.child.Meta.model
+
+    def preload_related(self, data: list) -> dict:
+        """
+        Reads the objects referenced by the primary key fields of all items,
+        one query per model/queryset.
+        """
+        ids = defaultdict(set)
+        querysets = {}
+        for field in self.child._writable_fields:
+            relation = getattr(field, "child_relation", field)
+            if not isinstance(relation, PreloadedPrimaryKeyRelatedField):
+                continue
+            queryset = relation.get_queryset()
+            key = _preload_key(queryset)
+            querysets[key] = queryset
+            pk_field = queryset.model._meta.pk
+            for item in data:
+                if not isinstance(item, dict) or field.field_name not in item:
+                    continue
+                values = item[field.field_name]
+                for value in values if isinstance(values, list) else [values]:
+                    try:
+                        if not isinstance(value, bool):
+                            ids[key].add(pk_field.to_python(value))
+                    except DjangoValidationError:
+                        pass  # reported by the field itself
+        return {key: queryset.in_bulk(ids[key]) for key, queryset in querysets.items()}
+
+    def load_instances(self, data: list) -> dict:
+        pk_field = self.model._meta.pk
+        ids = set()
+        for item in data:
+            try:
+                ids.add(pk_field.to_python(item.get("id")))
+            except (AttributeError, DjangoValidationError):
+                pass
+        ids.discard(None)
+        return self.instance.in_bulk(ids)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._context["preloaded_objects"] = self.preload_related(data)
+            if self.instance is not None:
+                self._instances_by_pk = self.load_instances(data)
+                self._instances = []
+                self._seen_pks = set()
+        items = super().to_internal_value(data)
+        # raised from here, not validate(), so the errors stay aligned with the items
+        self.validate_unique_together(items)
+        validate_items = getattr(self.child, "validate_items", None)
+        if validate_items is not None:
+            errors = validate_items(items, self.item_instances(items))
+            if any(errors):
+                raise serializers.ValidationError(errors)
+        return items
+
+    def item_instances(self, items: list[dict]) -> list[Model | None]:
+        """The instance each validated item updates, None for new objects."""
+        return self._instances if self.instance is not None else [None] * len(items)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        try:
+            pk = self.model._meta.pk.to_python(data.get("id"))
+        except (AttributeError, DjangoValidationError):
+            pk = None
+        instance = self._instances_by_pk.get(pk)
+        if instance is None:
+            raise serializers.ValidationError({"id": ["Object with this id does not exist."]})
+        if pk in self._seen_pks:
+            raise serializers.ValidationError({"id": ["Duplicate id in the payload."]})
+
+        self.child.instance = instance
+        self.child.initial_data = data
+        try:
+            attrs = super().run_child_validation(data)
+        finally:
+            self.child.instance = None
+        self._instances.append(instance)
+        self._seen_pks.add(pk)
+        return attrs
+
+    def validate_unique_together(self, items: list[dict]) -> None:
+        if not self.unique_together:
+            return
+        instances = self.item_instances(items)
+        errors = [{} for _ in items]
+        for validator in self.unique_together:
+            sources = [self.child.fields[name].source for name in validator.fields]
+            attnames = [self.model._meta.get_field(source).attname for source in sources]
+            message = validator.message.format(field_names=", ".join(validator.fields))
+
+            values = []
+            for attrs, instance in zip(items, instances):
+                values.append(
+                    tuple(
+                        _pk_value(attrs[source]) if source in attrs else getattr(instance, attname)
+                        for source, attname in zip(sources, attnames)
+                    )
+                )
+
+            existing = {
+                row[1:]: row[0]
+                for row in validator.queryset.filter(
+                    **{
+                        f"{source}__in": {value[i] for value in values}
+                        for i, source in enumerate(sources)
+                    }
+                ).values_list("pk", *sources)
+            }
+            seen = set()
+            for index, (value, instance) in enumerate(zip(values, instances)):
+                owner = existing.get(value)
+                if value in seen or (owner is not None and owner != _pk_value(instance)):
+                    errors[index].setdefault(api_settings.NON_FIELD_ERRORS_KEY, []).append(message)
+                seen.add(value)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+    def _pop_many_to_many(self, attrs: dict) -> dict:
+        relations = model_meta.get_field_info(self.model).relations
+        return {
+            name: attrs.pop(name)
+            for name in list(attrs)
+            if name in relations and relations[name].to_many
+        }
+
+    def _write_many_to_many(self, objs: list[Model], values: list[dict], *, replace: bool) -> None:
+        batch_size = getattr(settings, "AIRPORT_BULK_BATCH_SIZE", 1000)
+        for name in {name for many in values for name in many}:
+            field = self.model._meta.get_field(name)
+            through = field.remote_field.through
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            changed = [(obj, many[name]) for obj, many in zip(objs, values) if name in many]
+            if replace:
+                through.objects.filter(**{f"{source}__in": [obj for obj, _ in changed]}).delete()
+            through.objects.bulk_create(
+                [
+                    through(**{f"{source}_id": obj.pk, f"{target}_id": related.pk})
+                    for obj, related_objects in changed
+                    for related in related_objects
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+
+    def _prefetch_rendered(self, objs: list[Model]) -> None:
+        """
+        Prefetches the to-many relations the child renders for all objects,
+        one query per relation, whether the payload set them or not.
+        """
+        relations = model_meta.get_field_info(self.model).relations
+        for name in {field.source for field in self.child._readable_fields}:
+            if name in relations and relations[name].to_many:
+                for obj in objs:
+                    getattr(obj, "_prefetched_objects_cache", {}).pop(name, None)
+                prefetch_related_objects(objs, name)
+
+    def create(self, validated_data):
+        many_to_many = [self._pop_many_to_many(attrs) for attrs in validated_data]
+        objs = [self.model(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            self.model._default_manager.bulk_create(
+                objs, batch_size=getattr(settings, "AIRPORT_BULK_BATCH_SIZE", 1000)
+            )
+            self._write_many_to_many(objs, many_to_many, replace=False)
+        self._prefetch_rendered(objs)
+        return objs
+
+    def update(self, instance, validated_data):
+        many_to_many = [self._pop_many_to_many(attrs) for attrs in validated_data]
+        fields = set()
+        for obj, attrs in zip(self._instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+            fields.update(attrs)
+
+        # bulk_update skips pre_save(), so auto_now fields are set here
+        now = timezone.now()
+        for field in self.model._meta.concrete_fields:
+            if getattr(field, "auto_now", False):
+                for obj in self._instances:
+                    setattr(obj, field.attname, now)
+                fields.add(field.name)
+
+        with transaction.atomic():
+            self.model._default_manager.bulk_update(
+                self._instances,
+                sorted(fields),
+                batch_size=getattr(settings, "AIRPORT_BULK_BATCH_SIZE", 1000),
+            )
+            self._write_many_to_many(self._instances, many_to_many, replace=True)
+        self._prefetch_rendered(self._instances)
+        return self._instances
+
+
+class BulkModelMixin:
+    """
+    Adds {prefix}/bulk/ to a ModelViewSet: POST a list of objects to create
+    them, PATCH a list of partial objects with their "id" to update them.
+    Either every item is written or none, errors come back as a list aligned
+    with the payload. The serializer must use BulkListSerializer as its
+    list_serializer_class.
+    """
+
+    @action(detail=False, methods=["post", "patch"], filter_backends=(), pagination_class=None)
+    def bulk(self, request):
+        """
+        POST: create every object of the list. PATCH: partially update the
+        objects identified by "id". All or nothing, errors are aligned with
+        the payload.
+        """
+        created = request.method == "POST"
+        options = {
+            "many": True,
+            "allow_empty": False,
+            "max_length": getattr(settings, "AIRPORT_BULK_MAX_ITEMS", 5000),
+        }
+        if created:
+            serializer = self.get_serializer(data=request.data, **options)
+        else:
+            serializer = self.get_serializer(
+                self.get_queryset(), data=request.data, partial=True, **options
+            )
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            objs = serializer.save()
+            self.bulk_saved(objs, created=created)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def bulk_saved(self, objs: list[Model], *, created: bool) -> None:
+        """Called inside the write transaction, in place of the model signals."""
@@ -0,0 +1,172 @@
+"""
+Versioned response cache and conditional GET support for the viewsets.
+
+Every cached model has a version counter in the cache. Cache keys of
+responses include the versions of all models a viewset renders, so bumping a
+counter (post_save/post_delete, see airport.signals) invalidates every
+dependent response at once without looking them up.
+
+Versions are nanosecond timestamps of the last change, so they also serve as
+Last-Modified values.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_KEY = "airport:version:{label}"
+RESPONSE_KEY = "airport:response:{versions}:{request}"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _version_key(model: type[Model]) -> str:
+    return VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def get_versions(models) -> list[int]:
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Unknown (evicted or never changed since the cache started):
+            # "now" is a safe guess, it is newer than anything cached before.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model: type[Model]) -> None:
+    key = _version_key(model)
+    current = cache.get(key) or 0
+    cache.set(key, max(time.time_ns(), current + 1), None)
+
+
+def version_to_datetime(version: int) -> datetime:
+    return datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+
+
+def record(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def get_stats() -> dict:
+    """Hit/miss counters of the current process."""
+    with _stats_lock:
+        hits, misses = _stats["hit"], _stats["miss"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+class CachedResponseMixin:
+    """
+    Caches JSON list/retrieve responses of a viewset.
+
+    cache_models lists every model rendered by the viewset (including nested
+    serializers), a change to any of them invalidates the cached responses.
+    """
+
+    cache_models: tuple[type[Model], ...] = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request) -> str:
+        versions = ".".join(str(version) for version in get_versions(self.cache_models))
+        query = sorted(request.query_params.lists())
+        digest = hashlib.md5(
+            f"{request.path}?{query}".encode(), usedforsecurity=False
+        ).hexdigest()
+        return RESPONSE_KEY.format(versions=versions, request=digest)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        # the browsable API renders per-user content (login state, CSRF token)
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record("hit")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        record("miss")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, "AIRPORT_RESPONSE_CACHE_TIMEOUT", 3600))
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Answers list/retrieve GETs with 304 Not Modified when the client's
+    If-None-Match / If-Modified-Since still match, before the queryset is
+    serialized.
+
+    By default the validators come from the cache_models versions only, so
+    checking them costs no queries. Viewsets whose data changes without a
+    version bump override get_validators().
+    """
+
+    cache_models: tuple[type[Model], ...] = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_validators(self, request) -> tuple[list, datetime | None]:
+        """
+        Returns (etag parts, last modified) of the response about to be built;
+        (None, None) skips the conditional check.
+        """
+        versions = get_versions(self.cache_models)
+        last_modified = version_to_datetime(max(versions)) if versions else None
+        return versions, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        parts, last_modified = self.get_validators(request)
+        if parts is None:
+            return handler(request, *args, **kwargs)
+
+        etag = '"{}"'.format(
+            hashlib.md5(
+                repr(
+                    (request.get_full_path(), request.accepted_renderer.format, parts)
+                ).encode(),
+                usedforsecurity=False,
+            ).hexdigest()
+        )
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified_ts
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified_ts is not None:
+                response["Last-Modified"] = http_date(last_modified_ts)
+        return response
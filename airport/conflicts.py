@@ -0,0 +1,157 @@
+"""
+Double-booking detection for airplanes and crew members.
+
+Both the flight validation and the audit reduce to the same sweep: the
+flights of one resource sorted by departure, with a heap of the ones still
+in the air. Every flight is pushed and popped once, so a season of n flights
+is checked in O(n log n) plus the number of conflicts found.
+"""
+from __future__ import annotations
+
+import heapq
+from collections import defaultdict
+from datetime import datetime
+from typing import Hashable, Iterable, Iterator
+
+from django.db.models import Q
+
+from airport.models import Flight
+
+CrewFlight = Flight.crew.through
+
+
+def overlapping_pairs(
+    intervals: Iterable[tuple[Hashable, Hashable, datetime, datetime]],
+) -> Iterator[tuple[Hashable, Hashable, Hashable]]:
+    """
+    Yields (resource, earlier, later) for every pair of overlapping intervals
+    of the same resource. The intervals are (resource, ref, start, end) and
+    must be sorted by (resource, start); touching intervals do not overlap.
+    """
+    in_air: list = []
+    current = object()
+    for seq, (resource, ref, start, end) in enumerate(intervals):
+        if resource != current:
+            in_air = []
+            current = resource
+        while in_air and in_air[0][0] <= start:
+            heapq.heappop(in_air)
+        for _, _, other in in_air:
+            yield resource, other, ref
+        heapq.heappush(in_air, (end, seq, ref))
+
+
+def _in_window(start: datetime | None, end: datetime | None, prefix: str = "") -> Q:
+    condition = Q()
+    if end is not None:
+        condition &= Q(**{f"{prefix}departure_time__lt": end})
+    if start is not None:
+        condition &= Q(**{f"{prefix}arrival_time__gt": start})
+    return condition
+
+
+def audit_conflicts(
+    *, start: datetime | None = None, end: datetime | None = None
+) -> Iterator[dict]:
+    """
+    Every pair of overlapping flights sharing an airplane or a crew member,
+    among the flights in the air between start and end.
+    """
+    airplane_flights = (
+        Flight.objects.filter(_in_window(start, end))
+        .order_by("airplane_id", "departure_time")
+        .values_list("airplane_id", "pk", "departure_time", "arrival_time")
+    )
+    for airplane_id, first, second in overlapping_pairs(airplane_flights.iterator(chunk_size=5000)):
+        yield {"resource": "airplane", "id": airplane_id, "flights": [first, second]}
+
+    crew_flights = (
+        CrewFlight.objects.filter(_in_window(start, end, "flight__"))
+        .order_by("crew_id", "flight__departure_time")
+        .values_list("crew_id", "flight_id", "flight__departure_time", "flight__arrival_time")
+    )
+    for crew_id, first, second in overlapping_pairs(crew_flights.iterator(chunk_size=5000)):
+        yield {"resource": "crew", "id": crew_id, "flights": [first, second]}
+
+
+def find_conflicts(items: list[dict]) -> list[dict]:
+    """
+    Checks planned flights against each other and against the stored ones.
+
+    Every item has airplane_id, crew_ids, departure_time, arrival_time and
+    pk (None for new flights, the stored row is then ignored). Returns
+    serializer-style errors aligned with the items. Costs one query for the
+    airplanes and one for the crew, whatever the number of items.
+    """
+    errors: list[dict] = [{} for _ in items]
+    if not items:
+        return errors
+
+    window_start = min(item["departure_time"] for item in items)
+    window_end = max(item["arrival_time"] for item in items)
+    replaced = [item["pk"] for item in items if item["pk"] is not None]
+
+    airplane_ids = {item["airplane_id"] for item in items}
+    stored_airplanes = (
+        Flight.objects.filter(
+            _in_window(window_start, window_end), airplane_id__in=airplane_ids
+        )
+        .exclude(pk__in=replaced)
+        .values_list("airplane_id", "pk", "departure_time", "arrival_time")
+    )
+    planned_airplanes = [
+        (item["airplane_id"], ("item", index), item["departure_time"], item["arrival_time"])
+        for index, item in enumerate(items)
+    ]
+    _report(
+        errors,
+        planned_airplanes,
+        stored_airplanes,
+        field="airplane_id",
+        message="Airplane is already on {other} at that time.",
+    )
+
+    crew_ids = {crew_id for item in items for crew_id in item["crew_ids"]}
+    if crew_ids:
+        stored_crew = (
+            CrewFlight.objects.filter(
+                _in_window(window_start, window_end, "flight__"), crew_id__in=crew_ids
+            )
+            .exclude(flight_id__in=replaced)
+            .values_list("crew_id", "flight_id", "flight__departure_time", "flight__arrival_time")
+        )
+        planned_crew = [
+            (crew_id, ("item", index), item["departure_time"], item["arrival_time"])
+            for index, item in enumerate(items)
+            for crew_id in item["crew_ids"]
+        ]
+        _report(
+            errors,
+            planned_crew,
+            stored_crew,
+            field="crew_ids",
+            message="Crew member {resource} is already on {other} at that time.",
+        )
+    return errors
+
+
+def _report(errors: list[dict], planned: list, stored, *, field: str, message: str) -> None:
+    intervals = planned + list(stored)
+    intervals.sort(key=lambda interval: (interval[0], interval[2]))
+
+    found = defaultdict(list)
+    for resource, first, second in overlapping_pairs(intervals):
+        for ref, other in ((first, second), (second, first)):
+            if isinstance(ref, tuple):
+                found[ref[1]].append((resource, other))
+
+    for index, conflicts in found.items():
+        errors[index].setdefault(field, []).extend(
+            message.format(
+                resource=resource,
+                other=f"item {other[1]} of this request"
+                if isinstance(other, tuple)
+                else f"flight #{other}",
+            )
+            for resource, other in conflicts
+        )
@@ -0,0 +1,268 @@
+"""
+In-memory connection search over the Route graph.
+
+ConnectionIndex keeps the upcoming flights grouped by departure airport and
+sorted by departure time. It is loaded lazily, fully reloaded every
+AIRPORT_CONNECTION_INDEX_TTL seconds and patched incrementally by the
+Flight/Route signals in between, so a search never touches the database.
+
+Every process has its own index. Changes are also published through the
+shared Route/Flight versions of airport.caching: an index loaded under older
+versions is reloaded before the next search, so the other workers (and
+changes made by management commands) are picked up too. This needs a cache
+shared by the processes, see DJANGO_CACHE_BACKEND.
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+import time as monotonic_time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import count
+from operator import attrgetter
+from typing import Iterable
+
+from django.conf import settings
+from django.utils import timezone
+
+from airport.caching import bump_version, get_versions
+from airport.models import Flight, Route
+
+departure_key = attrgetter("departure_time")
+
+# the index is built from these tables
+VERSION_MODELS = (Route, Flight)
+
+
+@dataclass(frozen=True)
+class Leg:
+    flight_id: int
+    source_id: int
+    destination_id: int
+    departure_time: datetime
+    arrival_time: datetime
+
+
+class ConnectionIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._departures: dict[int, list[Leg]] = {}
+        self._legs: dict[int, Leg] = {}
+        self._loaded_at: float | None = None
+        self._versions: list[int] | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @staticmethod
+    def _flights():
+        # flights that already landed yesterday cannot start a connection
+        since = timezone.now() - timedelta(days=1)
+        return (
+            Flight.objects.filter(departure_time__gte=since)
+            .order_by()
+            .values_list(
+                "pk",
+                "route__source_id",
+                "route__destination_id",
+                "departure_time",
+                "arrival_time",
+            )
+        )
+
+    def load(self) -> None:
+        # read first: a change made while loading triggers another load
+        versions = get_versions(VERSION_MODELS)
+        departures: dict[int, list[Leg]] = {}
+        legs: dict[int, Leg] = {}
+        for row in self._flights().iterator(chunk_size=5000):
+            leg = Leg(*row)
+            legs[leg.flight_id] = leg
+            departures.setdefault(leg.source_id, []).append(leg)
+        for airport_legs in departures.values():
+            airport_legs.sort(key=departure_key)
+
+        with self._lock:
+            self._departures = departures
+            self._legs = legs
+            self._loaded_at = monotonic_time.monotonic()
+            self._versions = versions
+
+    def ensure_fresh(self) -> None:
+        ttl = getattr(settings, "AIRPORT_CONNECTION_INDEX_TTL", 300)
+        if (
+            self._loaded_at is None
+            or monotonic_time.monotonic() - self._loaded_at > ttl
+            or get_versions(VERSION_MODELS) != self._versions
+        ):
+            self.load()
+
+    def invalidate(self) -> None:
+        """Reload in every process, e.g. after bulk writes that send no signals."""
+        self._loaded_at = None
+        bump_version(Flight)
+
+    def refresh_flights(self, flight_ids: Iterable[int]) -> None:
+        """Re-reads the given flights, dropping the ones that no longer exist."""
+        flight_ids = set(flight_ids)
+        if self.is_loaded:
+            fresh = {row[0]: Leg(*row) for row in self._flights().filter(pk__in=flight_ids)}
+            with self._lock:
+                for flight_id in flight_ids:
+                    self._discard(flight_id)
+                    if flight_id in fresh:
+                        self._add(fresh[flight_id])
+        self._publish()
+
+    def remove_flights(self, flight_ids: Iterable[int]) -> None:
+        if self.is_loaded:
+            with self._lock:
+                for flight_id in flight_ids:
+                    self._discard(flight_id)
+        self._publish()
+
+    def _publish(self) -> None:
+        # the other processes reload; this one is patched already and keeps
+        # its index, unless another change was published since it was loaded
+        before = get_versions(VERSION_MODELS)
+        bump_version(Flight)
+        if self.is_loaded and before == self._versions:
+            self._versions = get_versions(VERSION_MODELS)
+
+    # Readers never take the lock: lists are replaced, not mutated in place.
+
+    def _add(self, leg: Leg) -> None:
+        airport_legs = list(self._departures.get(leg.source_id, ()))
+        insort(airport_legs, leg, key=departure_key)
+        self._departures[leg.source_id] = airport_legs
+        self._legs[leg.flight_id] = leg
+
+    def _discard(self, flight_id: int) -> None:
+        leg = self._legs.pop(flight_id, None)
+        if leg is None:
+            return
+        self._departures[leg.source_id] = [
+            other for other in self._departures[leg.source_id] if other.flight_id != flight_id
+        ]
+
+    def departures(self, airport_id: int, start: datetime, end: datetime) -> list[Leg]:
+        """Legs leaving the airport in [start, end), ordered by departure time."""
+        airport_legs = self._departures.get(airport_id, ())
+        lo = bisect_left(airport_legs, start, key=departure_key)
+        hi = bisect_left(airport_legs, end, lo=lo, key=departure_key)
+        return airport_legs[lo:hi]
+
+    def search(
+        self,
+        *,
+        source_id: int,
+        destination_id: int,
+        start: datetime,
+        end: datetime,
+        max_legs: int,
+        min_connection: timedelta,
+        max_connection: timedelta,
+    ) -> list[list[Leg]]:
+        """
+        Itineraries leaving source_id in [start, end) and reaching destination_id.
+
+        For every first leg the earliest arrival is found with a time-dependent
+        Dijkstra over (airport, legs) labels; itineraries that leave earlier
+        and arrive later than another one are dropped.
+        """
+        itineraries = []
+        for first_leg in self.departures(source_id, start, end):
+            path = self._earliest_arrival(
+                first_leg,
+                source_id=source_id,
+                destination_id=destination_id,
+                max_legs=max_legs,
+                min_connection=min_connection,
+                max_connection=max_connection,
+            )
+            if path is not None:
+                itineraries.append(path)
+
+        # keep the Pareto front: later departure or earlier arrival (then fewer legs)
+        itineraries.sort(key=lambda legs: (-legs[0].departure_time.timestamp(), len(legs)))
+        best_arrival = None
+        front = []
+        for legs in itineraries:
+            arrival = legs[-1].arrival_time
+            if best_arrival is None or arrival < best_arrival:
+                front.append(legs)
+                best_arrival = arrival
+        front.reverse()
+        return front
+
+    def _earliest_arrival(
+        self,
+        first_leg: Leg,
+        *,
+        source_id: int,
+        destination_id: int,
+        max_legs: int,
+        min_connection: timedelta,
+        max_connection: timedelta,
+    ) -> list[Leg] | None:
+        tie_breaker = count()
+        # best_arrival[airport][n] - earliest arrival at airport using n legs
+        best_arrival: dict[int, dict[int, datetime]] = {}
+        heap = [(first_leg.arrival_time, 1, next(tie_breaker), (first_leg,))]
+
+        while heap:
+            arrival, legs_used, _, path = heapq.heappop(heap)
+            airport_id = path[-1].destination_id
+            if airport_id == destination_id:
+                return list(path)
+            if legs_used >= max_legs:
+                continue
+
+            for leg in self.departures(
+                airport_id, arrival + min_connection, arrival + max_connection + timedelta.resolution
+            ):
+                next_airport = leg.destination_id
+                if next_airport == source_id:
+                    continue
+                labels = best_arrival.setdefault(next_airport, {})
+                if any(
+                    n <= legs_used + 1 and best <= leg.arrival_time
+                    for n, best in labels.items()
+                ):
+                    continue
+                labels[legs_used + 1] = leg.arrival_time
+                heapq.heappush(
+                    heap,
+                    (leg.arrival_time, legs_used + 1, next(tie_breaker), path + (leg,)),
+                )
+        return None
+
+
+connection_index = ConnectionIndex()
+
+
+def search_connections(
+    *,
+    source_id: int,
+    destination_id: int,
+    start: datetime,
+    end: datetime,
+    max_legs: int,
+) -> list[list[Leg]]:
+    connection_index.ensure_fresh()
+    return connection_index.search(
+        source_id=source_id,
+        destination_id=destination_id,
+        start=start,
+        end=end,
+        max_legs=max_legs,
+        min_connection=timedelta(
+            minutes=getattr(settings, "AIRPORT_MIN_CONNECTION_MINUTES", 45)
+        ),
+        max_connection=timedelta(
+            hours=getattr(settings, "AIRPORT_MAX_CONNECTION_HOURS", 24)
+        ),
+    )
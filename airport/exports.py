@@ -0,0 +1,66 @@
+"""
+Streaming exports: rows are read with QuerySet.iterator() and written out one
+by one, so memory stays flat regardless of the number of rows.
+"""
+import csv
+from typing import Iterable, Iterator, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object for csv.writer returning each line instead of storing it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_rows(queryset: QuerySet, columns: Sequence[str]) -> Iterator[tuple]:
+    return queryset.values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def ndjson_lines(header: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + "\n"
+
+
+def csv_lines(header: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+    # dates are formatted like in the NDJSON export
+    encoder = DjangoJSONEncoder()
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(
+            [value if isinstance(value, (str, int)) or value is None else encoder.default(value)
+             for value in row]
+        )
+
+
+def export_response(
+    queryset: QuerySet,
+    columns: dict[str, str],
+    *,
+    export_format: str,
+    filename: str,
+) -> StreamingHttpResponse:
+    """
+    Streams queryset rows as NDJSON or CSV.
+
+    columns maps output names to queryset lookups, e.g. {"source": "route__source__name"}.
+    """
+    header = list(columns)
+    rows = iter_rows(queryset, list(columns.values()))
+    if export_format == "csv":
+        lines, content_type = csv_lines(header, rows), "text/csv; charset=utf-8"
+    else:
+        lines, content_type = ndjson_lines(header, rows), "application/x-ndjson; charset=utf-8"
+        export_format = "ndjson"
+
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,53 @@
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+
+from airport.models import Flight
+
+
+class FlightFilter(django_filters.FilterSet):
+    departure_after = django_filters.IsoDateTimeFilter(
+        field_name="departure_time",
+        lookup_expr="gte",
+        label="Departure at or after (ISO 8601)",
+    )
+    departure_before = django_filters.IsoDateTimeFilter(
+        field_name="departure_time",
+        lookup_expr="lt",
+        label="Departure before (ISO 8601)",
+    )
+    date = django_filters.DateFilter(
+        method="filter_date",
+        label="Departure date (YYYY-MM-DD)",
+    )
+    source_city = django_filters.CharFilter(
+        field_name="route__source__closest_big_city",
+        lookup_expr="iexact",
+    )
+    destination_city = django_filters.CharFilter(
+        field_name="route__destination__closest_big_city",
+        lookup_expr="iexact",
+    )
+    min_available = django_filters.NumberFilter(
+        field_name="seats_available",
+        lookup_expr="gte",
+        label="Minimum number of free seats",
+    )
+
+    class Meta:
+        model = Flight
+        fields = (
+            "route__source",
+            "route__destination",
+            "airplane",
+            "airplane__airplane_type",
+        )
+
+    def filter_date(self, queryset, name, value):
+        # A half-open [00:00, next day 00:00) range in the current time zone
+        # instead of departure_time__date, so the departure_time indexes are
+        # used as a range scan.
+        start = datetime.combine(value, time.min, tzinfo=timezone.get_current_timezone())
+        end = datetime.combine(value + timedelta(days=1), time.min, tzinfo=start.tzinfo)
+        return queryset.filter(departure_time__gte=start, departure_time__lt=end)
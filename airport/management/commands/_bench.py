@@ -0,0 +1,98 @@
+"""Helpers shared by the HTTP benchmark commands (not a command itself)."""
+from __future__ import annotations
+
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(
+    latencies: list[float], elapsed: float, errors: int = 0, queries: list[int] | None = None
+) -> dict:
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+    if queries is not None:
+        summary["queries_avg"] = round(sum(queries) / len(queries), 2) if queries else None
+        summary["queries_max"] = max(queries, default=None)
+    return summary
+
+
+def query_count(headers) -> int | None:
+    """SQL queries of a response, from its Server-Timing header (airport.middleware)."""
+    match = SERVER_TIMING_QUERIES.search(headers.get("Server-Timing", ""))
+    return int(match.group(1)) if match else None
+
+
+def fetch(
+    url: str,
+    *,
+    method: str = "GET",
+    data: bytes | None = None,
+    headers: dict | None = None,
+    timeout: float = 60,
+) -> tuple[int, dict, bytes]:
+    request = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def measure(call, *, requests: int, concurrency: int) -> dict:
+    """
+    Runs call(i) -> (status, headers) for i in range(requests) from
+    `concurrency` threads, returns summarize() with the query counts of the
+    Server-Timing headers.
+    """
+    latencies: list[float] = []
+    queries: list[int] = []
+    errors = 0
+
+    def one(i) -> tuple[float, bool, int | None]:
+        started = time.perf_counter()
+        try:
+            status, headers = call(i)
+        except Exception:
+            status, headers = 0, {}
+        return time.perf_counter() - started, 200 <= status < 400, query_count(headers)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency, ok, count in pool.map(one, range(requests)):
+            if ok:
+                latencies.append(latency)
+            else:
+                errors += 1
+            if count is not None:
+                queries.append(count)
+    return summarize(latencies, time.perf_counter() - started, errors, queries)
+
+
+def load(url: str, *, requests: int, concurrency: int, headers: dict | None = None) -> dict:
+    """GETs url `requests` times from `concurrency` threads, returns summarize()."""
+
+    def call(_) -> tuple[int, dict]:
+        status, response_headers, _ = fetch(url, headers=headers)
+        return status, response_headers
+
+    return measure(call, requests=requests, concurrency=concurrency)
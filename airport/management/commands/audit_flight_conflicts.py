@@ -0,0 +1,59 @@
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.conflicts import audit_conflicts
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports airplanes and crew members assigned to overlapping flights "
+        "(one sorted sweep per resource, O(n log n))."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="start",
+            type=date.fromisoformat,
+            help="First day to check (YYYY-MM-DD), all flights by default.",
+        )
+        parser.add_argument(
+            "--to",
+            dest="end",
+            type=date.fromisoformat,
+            help="Last day to check (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            dest="as_json",
+            help="One JSON object per conflict (NDJSON) instead of text.",
+        )
+
+    def handle(self, *args, start, end, as_json: bool, **options):
+        conflicts = audit_conflicts(
+            start=day_start(start) if start else None,
+            end=day_start(end + timedelta(days=1)) if end else None,
+        )
+        found = 0
+        for conflict in conflicts:
+            found += 1
+            if as_json:
+                self.stdout.write(json.dumps(conflict))
+            else:
+                first, second = conflict["flights"]
+                self.stdout.write(
+                    f"{conflict['resource']} #{conflict['id']}: flights #{first} and #{second} overlap"
+                )
+
+        if not as_json:
+            style = self.style.WARNING if found else self.style.SUCCESS
+            self.stdout.write(style(f"Found {found} conflicts."))
+
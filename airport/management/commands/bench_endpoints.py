@@ -0,0 +1,231 @@
+import json
+import random
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, F
+from django.test import Client
+from django.test.utils import override_settings
+
+from airport.management.commands._bench import fetch, measure
+from airport.models import Airport, Flight, Order, Route, Ticket
+
+REPORT_COLUMNS = ("rps", "p50_ms", "p95_ms", "p99_ms", "queries_avg")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the main endpoints (flight list, search and detail, order create and "
+        "list) in-process through the Django test client, or against a running server with "
+        "--base-url. Prints latency percentiles, throughput and query counts as JSON; "
+        "--baseline compares with an earlier report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            help="Server to benchmark (it must use this database); in-process by default.",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=42, help="Picks the same flights.")
+        parser.add_argument("--username", default="user00001")
+        parser.add_argument("--password", default="synthetic")
+        parser.add_argument("--output", type=Path, help="Also write the report to this file.")
+        parser.add_argument(
+            "--baseline", type=Path, help="Earlier report to compare with (printed to stderr)."
+        )
+
+    def handle(self, *args, base_url, requests, concurrency, seed, **options):
+        if not Flight.objects.exists():
+            raise CommandError("No flights, run seed_synthetic first.")
+        self.rng = random.Random(seed)
+        self.base_url = base_url.rstrip("/") if base_url else None
+
+        user = get_user_model().objects.filter(username=options["username"]).first()
+        if user is None or not user.check_password(options["password"]):
+            raise CommandError(
+                f"No user {options['username']} with that password "
+                "(seed_synthetic creates user00001... with the password 'synthetic')."
+            )
+
+        # query counts come from the Server-Timing header, off in production by default
+        with override_settings(AIRPORT_SERVER_TIMING=True):
+            self.clients = {}
+            token = self.obtain_token(options["username"], options["password"])
+            self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+            endpoints = self.endpoints(requests)
+
+            results = {}
+            for name, call in endpoints.items():
+                call(-1)  # warm-up: caches, connection index, database connection
+                results[name] = measure(call, requests=requests, concurrency=concurrency)
+
+        report = {
+            "commit": self.commit(),
+            "created_at": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "mode": "http" if self.base_url else "client",
+            "base_url": self.base_url,
+            "database": connection.vendor,
+            "debug": settings.DEBUG,
+            "requests": requests,
+            "concurrency": concurrency,
+            "dataset": {
+                "airports": Airport.objects.count(),
+                "routes": Route.objects.count(),
+                "flights": Flight.objects.count(),
+                "orders": Order.objects.count(),
+                "tickets": Ticket.objects.count(),
+            },
+            "endpoints": results,
+        }
+        text = json.dumps(report, indent=2)
+        self.stdout.write(text)
+        if options["output"]:
+            options["output"].write_text(text + "\n")
+        if options["baseline"]:
+            self.compare(json.loads(options["baseline"].read_text()), report)
+
+    # requests
+
+    def request(self, method: str, path: str, data=None, *, auth=False) -> tuple[int, dict]:
+        headers = self.auth if auth else {}
+        if self.base_url:
+            body = None if data is None else json.dumps(data).encode()
+            request_headers = {"Content-Type": "application/json"} if body else {}
+            if auth:
+                request_headers["Authorization"] = headers["HTTP_AUTHORIZATION"]
+            status, response_headers, _ = fetch(
+                self.base_url + path, method=method, data=body, headers=request_headers
+            )
+            return status, response_headers
+
+        # Client is not thread-safe, one per thread
+        client = self.clients.get(threading.get_ident())
+        if client is None:
+            client = self.clients[threading.get_ident()] = Client(HTTP_HOST=_allowed_host())
+        if method == "POST":
+            response = client.post(path, data, content_type="application/json", **headers)
+        else:
+            response = client.get(path, **headers)
+        return response.status_code, response.headers
+
+    def obtain_token(self, username: str, password: str) -> str:
+        credentials = {"username": username, "password": password}
+        if self.base_url:
+            status, _, body = fetch(
+                f"{self.base_url}/api/accounts/token/",
+                method="POST",
+                data=json.dumps(credentials).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            data = json.loads(body) if status == 200 else {}
+        else:
+            client = Client(HTTP_HOST=_allowed_host())
+            response = client.post(
+                "/api/accounts/token/", credentials, content_type="application/json"
+            )
+            status, data = response.status_code, response.json()
+        if status != 200:
+            raise CommandError(f"Could not obtain a JWT token ({status}).")
+        return data["access"]
+
+    # endpoints
+
+    def endpoints(self, requests: int) -> dict:
+        flight_ids = list(Flight.objects.order_by("pk").values_list("pk", flat=True)[:10000])
+        sample = [self.rng.choice(flight_ids) for _ in range(requests + 1)]
+
+        # the busiest city pair, searched on the day of one of its flights
+        route = (
+            Route.objects.annotate(flight_count=Count("flights"))
+            .select_related("source", "destination")
+            .order_by("-flight_count", "pk")
+            .first()
+        )
+        day = route.flights.order_by("departure_time").values_list("departure_time", flat=True)[0]
+        search = (
+            f"/api/flights/?source_city={route.source.closest_big_city}"
+            f"&destination_city={route.destination.closest_big_city}&date={day.date()}"
+        )
+        seats = self.free_seats(requests + 1)
+
+        return {
+            "flight list": lambda i: self.request("GET", "/api/flights/"),
+            "flight search": lambda i: self.request("GET", search),
+            "flight detail": lambda i: self.request("GET", f"/api/flights/{sample[i]}/"),
+            "order create": lambda i: self.request(
+                "POST",
+                "/api/orders/",
+                {"flight_id": seats[i][0], "seats": [{"row": seats[i][1], "seat": seats[i][2]}]},
+                auth=True,
+            ),
+            "order list": lambda i: self.request("GET", "/api/orders/", auth=True),
+        }
+
+    def free_seats(self, count: int) -> list[tuple[int, int, int]]:
+        """count distinct free (flight, row, seat), one booking request each."""
+        seats = []
+        flights = (
+            Flight.objects.filter(
+                tickets_sold__lt=F("airplane__rows") * F("airplane__seats_in_row")
+            )
+            .order_by("-departure_time")
+            .values_list("pk", "airplane__rows", "airplane__seats_in_row")
+        )
+        for flight_id, rows, seats_in_row in flights.iterator(chunk_size=100):
+            taken = set(
+                Ticket.objects.filter(flight_id=flight_id).values_list("row", "seat")
+            )
+            for row in range(1, rows + 1):
+                for seat in range(1, seats_in_row + 1):
+                    if (row, seat) not in taken:
+                        seats.append((flight_id, row, seat))
+                        if len(seats) == count:
+                            return seats
+        raise CommandError(f"Fewer than {count} free seats left, seed a new dataset.")
+
+    # report
+
+    def commit(self) -> str | None:
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.strip()
+
+    def compare(self, baseline: dict, report: dict) -> None:
+        lines = [f"vs {baseline.get('commit')} ({baseline.get('created_at')}):"]
+        for name, row in report["endpoints"].items():
+            before = baseline.get("endpoints", {}).get(name)
+            if before is None:
+                continue
+            changes = []
+            for column in REPORT_COLUMNS:
+                old, new = before.get(column), row.get(column)
+                if not old or new is None:
+                    continue
+                changes.append(f"{column} {old} -> {new} ({(new - old) / old * 100:+.0f}%)")
+            lines.append(f"  {name}: " + ", ".join(changes))
+        sys.stderr.write("\n".join(lines) + "\n")
+
+
+def _allowed_host() -> str:
+    # the test client's default "testserver" is only allowed under the test runner
+    for host in settings.ALLOWED_HOSTS:
+        if host and "*" not in host and not host.startswith("."):
+            return host
+    return "localhost"
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.serializers import FLIGHT_LIST_VALUES, FlightListSerializer, flight_list_data
+from airport.views import FlightViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares FlightListSerializer with the values()-based flight_list_data "
+        "on the flights in the database and checks that both render the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000, help="Number of flights to render.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per implementation.")
+
+    def handle(self, *args, count: int, repeat: int, **options):
+        request = Request(APIRequestFactory().get("/api/flights/"))
+        view = FlightViewSet(action="list", request=request)
+        queryset = view.get_queryset()
+        if not queryset.exists():
+            raise CommandError("No flights in the database, seed some first.")
+        renderer = JSONRenderer()
+
+        def serializer_path() -> bytes:
+            flights = list(queryset[:count])
+            return renderer.render(FlightListSerializer(flights, many=True).data)
+
+        def values_path() -> bytes:
+            rows = list(queryset.values(*FLIGHT_LIST_VALUES)[:count])
+            return renderer.render(flight_list_data(rows))
+
+        expected, actual = serializer_path(), values_path()
+        if expected != actual:
+            raise CommandError("flight_list_data output differs from FlightListSerializer.")
+
+        results = {}
+        for name, render in (("serializer", serializer_path), ("values", values_path)):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                render()
+                timings.append(time.perf_counter() - started)
+            results[name] = min(timings)
+
+        rendered = expected.count(b'"departure_time"')
+        self.stdout.write(f"flights: {rendered}, output identical: {len(expected)} bytes")
+        for name, best in results.items():
+            self.stdout.write(f"{name:>10}: {best * 1000:8.1f} ms (best of {repeat})")
+        self.stdout.write(
+            self.style.SUCCESS(f"speedup: {results['serializer'] / results['values']:.1f}x")
+        )
@@ -0,0 +1,108 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.management.commands._bench import fetch, load
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests a running server: sync (DRF) vs async flight search and seat map "
+        "throughput, optionally while long-polling clients wait on the async seat map."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--flight",
+            type=int,
+            help="Flight id for the seat map endpoints (the first listed flight by default).",
+        )
+        parser.add_argument(
+            "--long-polls",
+            type=int,
+            default=0,
+            help="Async seat map requests kept waiting (?wait=) during the measurements.",
+        )
+        parser.add_argument(
+            "--query",
+            default="",
+            help='Extra flight filters, e.g. "source_city=Kyiv&min_available=1".',
+        )
+        parser.add_argument("--json", action="store_true", dest="as_json")
+
+    def handle(self, *args, base_url, requests, concurrency, flight, long_polls, query, as_json, **options):
+        api = base_url.rstrip("/") + "/api"
+        try:
+            status, _, body = fetch(f"{api}/flights/?page_size=1")
+        except OSError as e:
+            raise CommandError(f"Server not reachable at {base_url}: {e}") from e
+        if status != 200:
+            raise CommandError(f"GET /api/flights/ answered {status}.")
+        if flight is None:
+            results = json.loads(body)["results"]
+            if not results:
+                raise CommandError("No flights on the server, seed some first.")
+            flight = results[0]["id"]
+
+        extra = f"&{query}" if query else ""
+        endpoints = {
+            "sync search": f"{api}/flights/?{urlencode({'page_size': 50})}{extra}",
+            "async search": f"{api}/async/flights/?{urlencode({'limit': 50})}{extra}",
+            "sync seats": f"{api}/flights/{flight}/seats/",
+            "async seats": f"{api}/async/flights/{flight}/seats/",
+        }
+
+        waiting = self.start_long_polls(f"{api}/async/flights/{flight}/seats/", long_polls)
+        results = {}
+        for name, url in endpoints.items():
+            fetch(url)  # warm-up: connection index, caches
+            results[name] = load(url, requests=requests, concurrency=concurrency)
+        if waiting is not None:
+            results["long polls"] = waiting()
+
+        if as_json:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'endpoint':<14}{'requests':>9}{'errors':>8}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<14}{row['requests']:>9}{row['errors']:>8}{row['rps']:>9}"
+                f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+            )
+
+    def start_long_polls(self, url: str, count: int):
+        """Starts `count` waiting requests, returns a function collecting their summary."""
+        if not count:
+            return None
+        _, headers, _ = fetch(url)
+        etag = headers.get("ETag", "")
+        pool = ThreadPoolExecutor(max_workers=count)
+        started = time.perf_counter()
+        futures = [
+            pool.submit(fetch, f"{url}?wait=30", headers={"If-None-Match": etag})
+            for _ in range(count)
+        ]
+        time.sleep(0.5)  # let them connect before measuring
+
+        def collect() -> dict:
+            statuses = [future.result()[0] for future in futures]
+            pool.shutdown()
+            return {
+                "requests": count,
+                "errors": sum(status not in (200, 304) for status in statuses),
+                "rps": round(count / (time.perf_counter() - started), 1),
+                "p50_ms": "-",
+                "p95_ms": "-",
+                "p99_ms": "-",
+            }
+
+        return collect
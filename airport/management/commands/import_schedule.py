@@ -0,0 +1,322 @@
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.caching import bump_version
+from airport.connections import connection_index
+from airport.management.utils import batched, rate
+from airport.models import Airplane, AirplaneType, Airport, Crew, Flight, Route
+
+T = TypeVar("T")
+
+
+class RowError(ValueError):
+    """A row that cannot be imported, reported with its line and skipped."""
+
+
+def read_rows(path: Path) -> Iterator[tuple[int, object]]:
+    """
+    Streams (line number, row) of a CSV (with header) or NDJSON file, rows as
+    dicts. An NDJSON line that is not valid JSON is yielded as the raw text.
+    """
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except ValueError:
+                    yield line, text.strip()
+
+
+def text_field(row: dict, name: str, max_length: int = 255) -> str:
+    value = row.get(name)
+    # csv.DictReader fills the columns missing in short lines with None
+    if value is None or not str(value).strip():
+        raise RowError(f"missing {name}")
+    value = str(value)
+    if len(value) > max_length:
+        raise RowError(f"{name} is longer than {max_length} characters")
+    return value
+
+
+def positive_int_field(row: dict, name: str) -> int:
+    value = text_field(row, name)
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowError(f"{name} is not an integer: {value!r}") from None
+    if number < 1:
+        raise RowError(f"{name} must be positive: {number}")
+    return number
+
+
+def parse_crew(value: str) -> list[tuple[str, str]]:
+    """Splits "Jane Doe;John Smith" into (first name, last name) pairs."""
+    members = []
+    for name in value.split(";"):
+        parts = name.split(maxsplit=1)
+        if len(parts) == 2:
+            members.append((parts[0], parts[1]))
+    return members
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports airports, airplanes, routes and flights from CSV or NDJSON files "
+        "(format by extension: .csv, anything else is read as NDJSON)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=Path, help="name, closest_big_city")
+        parser.add_argument(
+            "--airplanes", type=Path, help="name, rows, seats_in_row, airplane_type"
+        )
+        parser.add_argument("--routes", type=Path, help="source, destination, distance")
+        parser.add_argument(
+            "--flights",
+            type=Path,
+            help=(
+                "source, destination, airplane, departure_time, arrival_time, "
+                'crew ("First Last;First Last", optional)'
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, batch_size: int, **options):
+        # airports and airplanes first, routes and flights look them up by name
+        files = {
+            name: options[name] for name in ("airports", "airplanes", "routes", "flights")
+        }
+        if not any(files.values()):
+            raise CommandError(
+                "Nothing to import, pass --airports, --airplanes, --routes or --flights."
+            )
+        for path in filter(None, files.values()):
+            if not path.exists():
+                raise CommandError(f"File not found: {path}")
+
+        self.batch_size = batch_size
+        self.skipped = 0
+        started = time.perf_counter()
+        total = 0
+        for name, path in files.items():
+            if path is None:
+                continue
+            section_started = time.perf_counter()
+            self.path = path
+            count = getattr(self, f"import_{name}")(read_rows(path))
+            elapsed = time.perf_counter() - section_started
+            total += count
+            self.stdout.write(f"{name}: {count} rows in {elapsed:.2f}s ({rate(count, elapsed)})")
+
+        # bulk_create sends no signals: invalidate caches derived from these tables
+        for model in (Airport, AirplaneType, Airplane, Route, Crew):
+            bump_version(model)
+        connection_index.invalidate()
+        if isinstance(cache, LocMemCache):
+            self.stderr.write(
+                self.style.WARNING(
+                    "The cache is local to this process: running servers keep serving "
+                    "cached data until it expires. Use a shared cache "
+                    "(DJANGO_CACHE_BACKEND=file) or restart them."
+                )
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} rows in {elapsed:.2f}s "
+                f"({rate(total, elapsed)}), skipped {self.skipped}."
+            )
+        )
+
+    def skip(self, line: int, row, reason: str) -> None:
+        self.skipped += 1
+        self.stderr.write(f"Skipped {self.path}:{line} {row}: {reason}")
+
+    def parsed(self, rows: Iterable[tuple[int, object]], parse: Callable[[dict], T]) -> Iterator[T]:
+        """parse() of every row, the rows it rejects with a RowError are reported and skipped."""
+        for line, row in rows:
+            try:
+                if not isinstance(row, dict):
+                    raise RowError("not a JSON object")
+                yield parse(row)
+            except RowError as e:
+                self.skip(line, row, str(e))
+
+    def import_airports(self, rows: Iterable[tuple[int, object]]) -> int:
+        def parse(row: dict) -> Airport:
+            return Airport(
+                name=text_field(row, "name"),
+                closest_big_city=text_field(row, "closest_big_city"),
+            )
+
+        count = 0
+        for airports in batched(self.parsed(rows, parse), self.batch_size):
+            Airport.objects.bulk_create(airports, ignore_conflicts=True)
+            count += len(airports)
+        return count
+
+    def import_airplanes(self, rows: Iterable[tuple[int, object]]) -> int:
+        def parse(row: dict) -> tuple[Airplane, str]:
+            airplane = Airplane(
+                name=text_field(row, "name"),
+                rows=positive_int_field(row, "rows"),
+                seats_in_row=positive_int_field(row, "seats_in_row"),
+            )
+            return airplane, text_field(row, "airplane_type")
+
+        types = dict(AirplaneType.objects.values_list("name", "pk"))
+        count = 0
+        for batch in batched(self.parsed(rows, parse), self.batch_size):
+            missing = {type_name for _, type_name in batch} - types.keys()
+            if missing:
+                AirplaneType.objects.bulk_create(
+                    [AirplaneType(name=name) for name in missing], ignore_conflicts=True
+                )
+                types.update(
+                    AirplaneType.objects.filter(name__in=missing).values_list("name", "pk")
+                )
+            for airplane, type_name in batch:
+                airplane.airplane_type_id = types[type_name]
+            Airplane.objects.bulk_create([airplane for airplane, _ in batch], ignore_conflicts=True)
+            count += len(batch)
+        return count
+
+    def import_routes(self, rows: Iterable[tuple[int, object]]) -> int:
+        airports = dict(Airport.objects.values_list("name", "pk"))
+
+        def parse(row: dict) -> Route:
+            source = airports.get(text_field(row, "source"))
+            destination = airports.get(text_field(row, "destination"))
+            if source is None or destination is None:
+                raise RowError("unknown airport")
+            # a CHECK constraint, ignore_conflicts does not skip it
+            if source == destination:
+                raise RowError("source and destination are the same airport")
+            return Route(
+                source_id=source,
+                destination_id=destination,
+                distance=positive_int_field(row, "distance"),
+            )
+
+        count = 0
+        for routes in batched(self.parsed(rows, parse), self.batch_size):
+            Route.objects.bulk_create(routes, ignore_conflicts=True)
+            count += len(routes)
+        return count
+
+    def import_flights(self, rows: Iterable[tuple[int, object]]) -> int:
+        airports = dict(Airport.objects.values_list("name", "pk"))
+        airplanes = dict(Airplane.objects.values_list("name", "pk"))
+        routes = {
+            (source, destination): pk
+            for pk, source, destination in Route.objects.values_list(
+                "pk", "source_id", "destination_id"
+            )
+        }
+        crew = {
+            (first_name, last_name): pk
+            for pk, first_name, last_name in Crew.objects.values_list(
+                "pk", "first_name", "last_name"
+            )
+        }
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # the crew through-table needs the ids of the inserted flights
+            raise CommandError("The database does not return ids from bulk inserts.")
+
+        def parse(row: dict) -> tuple[Flight, list[tuple[str, str]]]:
+            source = airports.get(text_field(row, "source"))
+            destination = airports.get(text_field(row, "destination"))
+            route = routes.get((source, destination))
+            airplane = airplanes.get(text_field(row, "airplane"))
+            if route is None or airplane is None:
+                raise RowError("unknown route or airplane")
+            departure = self.parse_time(text_field(row, "departure_time"))
+            arrival = self.parse_time(text_field(row, "arrival_time"))
+            if departure is None or arrival is None or arrival <= departure:
+                raise RowError("invalid departure/arrival time")
+            flight = Flight(
+                route_id=route,
+                airplane_id=airplane,
+                departure_time=departure,
+                arrival_time=arrival,
+            )
+            return flight, parse_crew(str(row.get("crew") or ""))
+
+        Through = Flight.crew.through
+        count = 0
+        for batch in batched(self.parsed(rows, parse), self.batch_size):
+            batch = self.new_flights(batch)
+            missing = {member for _, members in batch for member in members} - crew.keys()
+            with transaction.atomic():
+                if missing:
+                    Crew.objects.bulk_create(
+                        [Crew(first_name=first, last_name=last) for first, last in missing],
+                        ignore_conflicts=True,
+                    )
+                    for pk, first_name, last_name in Crew.objects.filter(
+                        last_name__in={last for _, last in missing}
+                    ).values_list("pk", "first_name", "last_name"):
+                        crew[first_name, last_name] = pk
+
+                Flight.objects.bulk_create([flight for flight, _ in batch])
+                Through.objects.bulk_create(
+                    [
+                        Through(flight_id=flight.pk, crew_id=crew[member])
+                        for flight, members in batch
+                        for member in members
+                    ],
+                    ignore_conflicts=True,
+                )
+            count += len(batch)
+        return count
+
+    def new_flights(self, batch: list[tuple[Flight, list]]) -> list[tuple[Flight, list]]:
+        """
+        The flights of batch not imported yet: a flight is identified by its
+        route, airplane and departure time, so importing a file twice does
+        not duplicate its flights.
+        """
+        departures = [flight.departure_time for flight, _ in batch]
+        seen = set(
+            Flight.objects.filter(
+                route_id__in={flight.route_id for flight, _ in batch},
+                departure_time__gte=min(departures),
+                departure_time__lte=max(departures),
+            ).values_list("route_id", "airplane_id", "departure_time")
+        )
+        new = []
+        for flight, members in batch:
+            key = (flight.route_id, flight.airplane_id, flight.departure_time)
+            if key in seen:
+                self.skipped += 1
+                continue
+            seen.add(key)
+            new.append((flight, members))
+        return new
+
+    @staticmethod
+    def parse_time(value: str):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            return None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
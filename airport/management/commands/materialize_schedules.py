@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from airport.schedules import materialize_schedules
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the missing flights of every flight schedule for the rolling "
+        "window (AIRPORT_SCHEDULE_WINDOW_DAYS). Safe to run repeatedly, e.g. daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Last local date to generate (YYYY-MM-DD) instead of the rolling window.",
+        )
+        parser.add_argument(
+            "--schedule",
+            type=int,
+            action="append",
+            dest="schedule_ids",
+            help="Only this schedule id (repeatable).",
+        )
+
+    def handle(self, *args, until, schedule_ids, **options):
+        created = materialize_schedules(until=until, schedule_ids=schedule_ids)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} flights."))
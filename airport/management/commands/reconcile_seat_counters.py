@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from airport.models import Flight, Ticket
+
+
+class Command(BaseCommand):
+    help = "Checks Flight.tickets_sold against the tickets table and repairs drifted counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of flights checked per batch.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted counters, do not repair them.",
+        )
+
+    def handle(self, *args, batch_size: int, dry_run: bool, **options):
+        ticket_counts = (
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        actual = Coalesce(Subquery(ticket_counts, output_field=IntegerField()), 0)
+
+        checked = drifted = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Flight.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .annotate(actual=actual)
+                .values_list("pk", "tickets_sold", "actual")[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            checked += len(batch)
+
+            drifted_ids = [pk for pk, stored, counted in batch if stored != counted]
+            if not drifted_ids:
+                continue
+            drifted += len(drifted_ids)
+            for pk, stored, counted in batch:
+                if stored != counted:
+                    self.stdout.write(f"Flight #{pk}: tickets_sold={stored}, tickets={counted}")
+
+            if not dry_run:
+                # recount inside the UPDATE so bookings committed meanwhile are not lost
+                with transaction.atomic():
+                    Flight.objects.filter(pk__in=drifted_ids).update(tickets_sold=actual)
+
+        action = "found" if dry_run else "repaired"
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} flights, {action} {drifted} drifted counters.")
+        )
@@ -0,0 +1,312 @@
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice, product
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from airport.caching import bump_version
+from airport.connections import connection_index
+from airport.management.utils import batched, rate
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+CITIES = [
+    "Kyiv", "Lviv", "Odesa", "Kharkiv", "Warsaw", "Krakow", "Berlin", "Munich", "Vienna",
+    "Prague", "Budapest", "Bucharest", "Sofia", "Athens", "Rome", "Milan", "Madrid",
+    "Barcelona", "Lisbon", "Paris", "Lyon", "Brussels", "Amsterdam", "London", "Dublin",
+    "Copenhagen", "Oslo", "Stockholm", "Helsinki", "Riga", "Vilnius", "Tallinn", "Zurich",
+    "Geneva", "Istanbul", "Ankara", "Tbilisi", "Yerevan", "Baku", "Chisinau",
+]
+FIRST_NAMES = [
+    "Olena", "Andrii", "Iryna", "Taras", "Maria", "Jan", "Anna", "Lukas", "Sofia", "Marco",
+    "Elena", "Pierre", "Claire", "Lars", "Ingrid", "Tomas", "Petra", "Ivan", "Nino", "David",
+]
+LAST_NAMES = [
+    "Shevchenko", "Kowalski", "Novak", "Muller", "Rossi", "Garcia", "Dubois", "Jansen",
+    "Nielsen", "Horvath", "Popescu", "Petrov", "Papadopoulos", "Silva", "Kelly", "Berg",
+    "Virtanen", "Ozols", "Kazlauskas", "Tamm", "Meier", "Yilmaz", "Beridze", "Aliyev",
+]
+# name, rows, seats in a row
+AIRPLANE_TYPES = [
+    ("Airbus A320", 30, 6),
+    ("Boeing 737-800", 32, 6),
+    ("Embraer E190", 25, 4),
+    ("ATR 72", 18, 4),
+]
+CREW_PER_FLIGHT = 2
+CRUISE_KMH = 780
+
+
+def distance_km(a: tuple[float, float], b: tuple[float, float]) -> int:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return max(100, round(2 * 6371 * math.asin(math.sqrt(h))))
+
+
+def crew_names():
+    """Unique (first, last) pairs; double-barrelled, then numbered names once plain ones run out."""
+    yield from product(FIRST_NAMES, LAST_NAMES)
+    for second, first, last in product(LAST_NAMES, FIRST_NAMES, LAST_NAMES):
+        if second != last:
+            yield first, f"{last}-{second}"
+    number = 2
+    while True:
+        for first, last in product(FIRST_NAMES, LAST_NAMES):
+            yield first, f"{last} {number}"
+        number += 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills an empty database with a synthetic, reproducible dataset for benchmarks: "
+        "airports with a hub-and-spoke route graph, airplanes, crew, a season of daily "
+        "flights and orders/tickets up to a load factor. Same --seed, same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--airports", type=int, default=40)
+        parser.add_argument(
+            "--hubs", type=int, default=4, help="Airports connected to every other airport."
+        )
+        parser.add_argument(
+            "--routes-per-airport",
+            type=int,
+            default=3,
+            help="Extra point-to-point connections of every airport, besides the hubs.",
+        )
+        parser.add_argument(
+            "--flights-per-day", type=int, default=1, help="Daily flights on every route."
+        )
+        parser.add_argument("--days", type=int, default=90, help="Length of the season.")
+        parser.add_argument(
+            "--start",
+            type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+            help="First day of the season (today by default).",
+        )
+        parser.add_argument(
+            "--load-factor",
+            type=float,
+            default=0.6,
+            help="Average share of sold seats of a flight (0 for no tickets).",
+        )
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--password", default="synthetic", help="Password of the users user00001, ..."
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, seed, batch_size, **options):
+        if Airport.objects.exists() or Flight.objects.exists():
+            raise CommandError("The database already has airports/flights, seed an empty one.")
+        if options["hubs"] >= options["airports"]:
+            raise CommandError("--hubs must be lower than --airports.")
+
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            airports = self.create_airports(options["airports"])
+            routes = self.create_routes(airports, options["hubs"], options["routes_per_airport"])
+            slots = self.create_fleet(routes, options["flights_per_day"])
+        users = self.create_users(options["users"], options["password"])
+        flights, tickets = self.create_flights(
+            slots,
+            start=options["start"] or timezone.localdate(),
+            days=options["days"],
+            load_factor=options["load_factor"],
+            users=users,
+        )
+
+        for model in (Airport, AirplaneType, Airplane, Route, Crew):
+            bump_version(model)
+        connection_index.invalidate()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(airports)} airports, {len(routes)} routes, {len(slots)} airplanes, "
+                f"{len(users)} users, {flights} flights, {tickets} tickets "
+                f"in {elapsed:.1f}s ({rate(flights + tickets, elapsed)})"
+            )
+        )
+
+    def create_airports(self, count: int) -> list[tuple[Airport, tuple[float, float]]]:
+        airports = []
+        for i in range(count):
+            city = CITIES[i % len(CITIES)]
+            suffix = f" {i // len(CITIES) + 1}" if i >= len(CITIES) else ""
+            airports.append(Airport(name=f"{city}{suffix} International", closest_big_city=city))
+        Airport.objects.bulk_create(airports, batch_size=self.batch_size)
+        # positions for the distances, within Europe
+        return [
+            (airport, (self.rng.uniform(36, 65), self.rng.uniform(-10, 45)))
+            for airport in airports
+        ]
+
+    def create_routes(self, airports, hubs: int, per_airport: int) -> list[Route]:
+        pairs = set()
+        for i in range(len(airports)):
+            for hub in range(hubs):
+                if hub != i:
+                    pairs.update({(i, hub), (hub, i)})
+            others = [j for j in range(hubs, len(airports)) if j != i]
+            for j in self.rng.sample(others, min(per_airport, len(others))):
+                pairs.update({(i, j), (j, i)})
+
+        routes = [
+            Route(
+                source=airports[i][0],
+                destination=airports[j][0],
+                distance=distance_km(airports[i][1], airports[j][1]),
+            )
+            for i, j in sorted(pairs)
+        ]
+        Route.objects.bulk_create(routes, batch_size=self.batch_size)
+        return routes
+
+    def create_fleet(self, routes: list[Route], per_day: int) -> list[tuple]:
+        """
+        One airplane and crew per (route, daily flight): a slot flies once a
+        day, so neither airplanes nor crew are ever double-booked.
+        """
+        types = [AirplaneType(name=name) for name, _, _ in AIRPLANE_TYPES]
+        AirplaneType.objects.bulk_create(types)
+
+        total = len(routes) * per_day
+        airplanes = []
+        for i in range(total):
+            index = self.rng.randrange(len(AIRPLANE_TYPES))
+            _, rows, seats_in_row = AIRPLANE_TYPES[index]
+            airplanes.append(
+                Airplane(
+                    name=f"UR-{i + 1:05d}",
+                    rows=rows,
+                    seats_in_row=seats_in_row,
+                    airplane_type=types[index],
+                )
+            )
+        Airplane.objects.bulk_create(airplanes, batch_size=self.batch_size)
+
+        crew = [
+            Crew(first_name=first, last_name=last)
+            for first, last in islice(crew_names(), total * CREW_PER_FLIGHT)
+        ]
+        self.rng.shuffle(crew)
+        Crew.objects.bulk_create(crew, batch_size=self.batch_size)
+
+        slots = []
+        for i, airplane in enumerate(airplanes):
+            route = routes[i // per_day]
+            # departures spread over the day, 05:00-22:00 UTC
+            minutes = self.rng.randrange(5 * 60, 22 * 60, 5)
+            duration = timedelta(minutes=round(route.distance / CRUISE_KMH * 60) + 30)
+            members = crew[i * CREW_PER_FLIGHT:(i + 1) * CREW_PER_FLIGHT]
+            slots.append((route, airplane, members, timedelta(minutes=minutes), duration))
+        return slots
+
+    def create_users(self, count: int, password: str) -> list[int]:
+        User = get_user_model()
+        hashed = make_password(password)  # hashed once, it is deliberately slow
+        users = [
+            User(username=f"user{i:05d}", email=f"user{i:05d}@example.com", password=hashed)
+            for i in range(1, count + 1)
+        ]
+        User.objects.bulk_create(users, batch_size=self.batch_size, ignore_conflicts=True)
+        return list(
+            User.objects.filter(username__in=[user.username for user in users])
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def create_flights(
+        self, slots, *, start, days: int, load_factor: float, users: list[int]
+    ) -> tuple[int, int]:
+        CrewFlight = Flight.crew.through
+        flights_count = tickets_count = 0
+        # orders are placed before the season starts, not before "now": same seed, same data
+        opening = datetime.combine(start, datetime.min.time()).replace(tzinfo=dt_timezone.utc)
+        plan = ((day, slot) for day in range(days) for slot in slots)
+        for batch in batched(plan, max(1, self.batch_size // 10)):
+            flights, sold = [], []
+            for day, (route, airplane, _, departure, duration) in batch:
+                midnight = datetime.combine(start + timedelta(days=day), datetime.min.time())
+                departure_time = midnight.replace(tzinfo=dt_timezone.utc) + departure
+                capacity = airplane.rows * airplane.seats_in_row
+                load = min(1.0, max(0.0, self.rng.gauss(load_factor, 0.15))) if users else 0.0
+                seats = self.rng.sample(range(capacity), round(capacity * load))
+                sold.append(seats)
+                flights.append(
+                    Flight(
+                        route=route,
+                        airplane=airplane,
+                        departure_time=departure_time,
+                        arrival_time=departure_time + duration,
+                        tickets_sold=len(seats),
+                    )
+                )
+
+            with transaction.atomic():
+                Flight.objects.bulk_create(flights)
+                CrewFlight.objects.bulk_create(
+                    [
+                        CrewFlight(flight_id=flight.pk, crew_id=member.pk)
+                        for flight, (_, (_, _, members, _, _)) in zip(flights, batch)
+                        for member in members
+                    ],
+                    batch_size=self.batch_size,
+                )
+                tickets_count += self.create_tickets(flights, sold, users, opening)
+            flights_count += len(flights)
+            self.stdout.write(f"  {flights_count} flights, {tickets_count} tickets")
+        return flights_count, tickets_count
+
+    def create_tickets(self, flights, sold, users, opening: datetime) -> int:
+        """Sold seats grouped into orders of 1-4 tickets of random users."""
+        orders, seats_of_order = [], []
+        for flight, seats in zip(flights, sold):
+            position = 0
+            while position < len(seats):
+                size = self.rng.choice((1, 1, 2, 2, 3, 4))
+                group = seats[position:position + size]
+                position += size
+                created_at = opening - timedelta(
+                    minutes=self.rng.randrange(10, 60 * 24 * 60)
+                )
+                orders.append(Order(user_id=self.rng.choice(users), created_at=created_at))
+                seats_of_order.append((flight, group))
+        if not orders:
+            return 0
+
+        Order.objects.bulk_create(orders, batch_size=self.batch_size)
+        # ids rather than instances: setting related objects is the slow part here
+        tickets = [
+            Ticket(
+                flight_id=flight.pk,
+                order_id=order.pk,
+                row=seat // flight.airplane.seats_in_row + 1,
+                seat=seat % flight.airplane.seats_in_row + 1,
+            )
+            for order, (flight, group) in zip(orders, seats_of_order)
+            for seat in group
+        ]
+        Ticket.objects.bulk_create(tickets, batch_size=self.batch_size)
+        return len(tickets)
@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from airport.models import Flight, Order
+from airport.services import (
+    BOOKING_LOCK_MODES,
+    FlightBusyError,
+    SeatBookingError,
+    SeatConflictError,
+    create_order_with_tickets,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Books random seats of one flight from several threads at once and reports "
+        "successful bookings per second and the conflict rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("flight_id", type=int)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--attempts", type=int, default=50, help="Bookings tried per thread.")
+        parser.add_argument("--seats", type=int, default=2, help="Seats per order.")
+        parser.add_argument("--lock", choices=BOOKING_LOCK_MODES, default="none")
+        parser.add_argument("--retries", type=int, default=0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the created orders (they are deleted by default).",
+        )
+
+    def handle(self, *args, flight_id, threads, attempts, seats, lock, retries, seed, keep, **options):
+        try:
+            flight = Flight.objects.select_related("airplane").get(pk=flight_id)
+        except Flight.DoesNotExist as e:
+            raise CommandError(f"Flight #{flight_id} does not exist.") from e
+
+        user, _ = get_user_model().objects.get_or_create(username="stress-booking")
+        all_seats = [
+            {"row": row, "seat": seat}
+            for row in range(1, flight.airplane.rows + 1)
+            for seat in range(1, flight.airplane.seats_in_row + 1)
+        ]
+        results = {"success": 0, "conflict": 0, "busy": 0, "error": 0}
+        results_lock = threading.Lock()
+
+        def worker(worker_id: int) -> None:
+            rnd = random.Random(seed + worker_id)
+            try:
+                for _ in range(attempts):
+                    try:
+                        create_order_with_tickets(
+                            user=user,
+                            flight=flight,
+                            seats=rnd.sample(all_seats, seats),
+                            lock=lock,
+                            retries=retries,
+                        )
+                        outcome = "success"
+                    except FlightBusyError:
+                        outcome = "busy"
+                    except SeatConflictError:
+                        outcome = "conflict"
+                    except SeatBookingError:
+                        outcome = "error"
+                    with results_lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = sum(results.values())
+        self.stdout.write(
+            f"lock={lock} retries={retries} threads={threads} vendor={connection.vendor}\n"
+            f"attempts: {total}, successful: {results['success']}, "
+            f"seat conflicts: {results['conflict']}, busy: {results['busy']}, "
+            f"errors: {results['error']}\n"
+            f"elapsed: {elapsed:.2f}s, bookings/s: {results['success'] / elapsed:.1f}, "
+            f"conflict rate: {(results['conflict'] + results['busy']) / total:.1%}"
+        )
+
+        if not keep:
+            Order.objects.filter(
+                pk__in=Order.objects.filter(user=user, tickets__flight=flight).values("pk")
+            ).delete()
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = "Deletes expired seat holds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of holds deleted per statement.",
+        )
+
+    def handle(self, *args, batch_size: int, **options):
+        # expired holds are already ignored by every query, this only frees the rows
+        now = timezone.now()
+        deleted = 0
+        while True:
+            batch = list(
+                SeatHold.objects.filter(expires_at__lte=now)
+                .order_by("expires_at")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            deleted += SeatHold.objects.filter(pk__in=batch).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired seat holds."))
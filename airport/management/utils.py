@@ -0,0 +1,17 @@
+"""Helpers shared by the bulk loading commands (import_schedule, seed_synthetic)."""
+from __future__ import annotations
+
+from itertools import islice
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def rate(count: int, elapsed: float) -> str:
+    return f"{count / elapsed if elapsed else 0:.0f} rows/s"
+
+
+def batched(rows: Iterable[T], size: int) -> Iterator[list[T]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
@@ -0,0 +1,305 @@
+"""
+In-process counters and histograms, served at /metrics in the Prometheus
+text exposition format.
+
+Every process has its own registry. Under a pre-fork server every worker
+would then report only its own share, so with AIRPORT_METRICS_DIR set each
+process also dumps its values to <dir>/<pid>.json (from a background thread,
+at most every AIRPORT_METRICS_FLUSH_SECONDS) and /metrics adds up the files
+of all processes. The values of exited workers are kept (folded into
+archive.json), so counters never go backwards; gunicorn.conf.py sets the
+directory and empties it on startup.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}, not {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def empty(self):
+        raise NotImplementedError
+
+    def samples(self, key: tuple[str, ...], value):
+        """(name, labels, value) of the exposition lines of one label set."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        registry.update(self, key, lambda value: value + amount)
+
+    def empty(self):
+        return 0
+
+    def samples(self, key, value):
+        yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), *, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+
+        def add(state):
+            # per-bucket (not cumulative) counts, the last one is +Inf; sum
+            counts, total = state
+            counts = list(counts)
+            counts[index] += 1
+            return [counts, total + value]
+
+        registry.update(self, key, add)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the with block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def empty(self):
+        return [[0] * (len(self.buckets) + 1), 0.0]
+
+    def samples(self, key, value):
+        labels = dict(zip(self.labelnames, key))
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+        yield f"{self.name}_sum", labels, total
+        yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+        self.values: dict[str, dict[tuple, object]] = {}
+        self.lock = threading.Lock()
+        self.dirty = threading.Event()
+        self.flusher_pid: int | None = None
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self.metrics[metric.name] = metric
+        self.values[metric.name] = {}
+
+    def update(self, metric: Metric, key: tuple, change) -> None:
+        with self.lock:
+            values = self.values[metric.name]
+            values[key] = change(values.get(key, metric.empty()))
+        if metrics_dir() is not None:
+            self.dirty.set()
+            self._ensure_flusher()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in values.items()]
+                for name, values in self.values.items()
+            }
+
+    # multi-process mode
+
+    def _ensure_flusher(self) -> None:
+        # threads do not survive fork(), every worker starts its own
+        if self.flusher_pid == os.getpid():
+            return
+        with self.lock:
+            if self.flusher_pid == os.getpid():
+                return
+            self.flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True).start()
+
+    def _flush_loop(self) -> None:
+        interval = getattr(settings, "AIRPORT_METRICS_FLUSH_SECONDS", 1.0)
+        while True:
+            self.dirty.wait()
+            time.sleep(interval)
+            self.flush()
+
+    def flush(self) -> None:
+        directory = metrics_dir()
+        if directory is None:
+            return
+        self.dirty.clear()
+        _write(directory / f"{os.getpid()}.json", self.snapshot())
+
+    def collect(self) -> dict[str, dict[tuple, object]]:
+        """Values of all processes in multi-process mode, else of this one."""
+        directory = metrics_dir()
+        if directory is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = _read_all(directory.glob("*.json"))
+        merged = merge_snapshots(snapshots)
+        return {name: merged.get(name, {}) for name in self.metrics}
+
+    def render(self) -> str:
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key in sorted(values):
+                for sample, labels, value in metric.samples(key, values[key]):
+                    lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _add(value, other):
+    # counters are numbers, histograms [bucket counts, sum]
+    if isinstance(value, list):
+        return [_add(a, b) for a, b in zip(value, other)]
+    return value + other
+
+
+def merge_snapshots(snapshots) -> dict[str, dict[tuple, object]]:
+    merged: dict[str, dict[tuple, object]] = {}
+    for snapshot in snapshots:
+        for name, entries in snapshot.items():
+            values = merged.setdefault(name, {})
+            for key, value in entries:
+                key = tuple(key)
+                values[key] = value if key not in values else _add(values[key], value)
+    return merged
+
+
+def _read_all(paths) -> list[dict]:
+    snapshots = []
+    for path in paths:
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # removed meanwhile
+    return snapshots
+
+
+def _write(path: Path, snapshot: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # written aside and renamed, a reader never sees half a file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w") as file:
+        json.dump(snapshot, file)
+    os.replace(tmp, path)
+
+
+def archive_process(directory: Path, pid: int) -> None:
+    """
+    Folds the file of an exited worker into archive.json, so recycled
+    workers (max_requests) do not pile up files. Called by gunicorn's
+    child_exit hook, in the master process.
+    """
+    path = directory / f"{pid}.json"
+    if not path.exists():
+        return
+    archive = directory / "archive.json"
+    merged = merge_snapshots(_read_all([archive, path]))
+    _write(
+        archive,
+        {
+            name: [[list(key), value] for key, value in values.items()]
+            for name, values in merged.items()
+        },
+    )
+    path.unlink()
+
+
+def metrics_dir() -> Path | None:
+    directory = getattr(settings, "AIRPORT_METRICS_DIR", "")
+    return Path(directory) if directory else None
+
+
+registry = Registry()
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    if registry.dirty.is_set():
+        registry.flush()
+
+
+BOOKINGS = Counter(
+    "airport_bookings_total",
+    "Seat bookings by outcome: success, conflict, busy, validation, error.",
+    ("outcome",),
+)
+BOOKING_DURATION = Histogram(
+    "airport_booking_duration_seconds",
+    "Duration of create_order_with_tickets, retries included.",
+    ("outcome",),
+)
+BOOKING_SEATS = Histogram(
+    "airport_booking_seats",
+    "Seats per successful booking.",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+)
+FLIGHT_REQUEST_DURATION = Histogram(
+    "airport_flight_request_duration_seconds",
+    "Duration of the flight list and retrieve actions, by action.",
+    ("action",),
+)
+JWT_AUTHENTICATIONS = Counter(
+    "airport_jwt_authentications_total",
+    "JWT authentications by outcome: success, failed, anonymous (no token).",
+    ("outcome",),
+)
+JWT_AUTHENTICATION_DURATION = Histogram(
+    "airport_jwt_authentication_duration_seconds",
+    "Duration of the JWT authentication (token decoding and user lookup).",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
@@ -0,0 +1,170 @@
+"""
+Per-request query count and latency instrumentation.
+
+RequestMetricsMiddleware counts the SQL queries of every request with a
+connection execute wrapper (works with DEBUG off, unlike
+connection.queries) and times:
+
+- db: time spent executing those queries
+- render: rendering of DRF/template responses (JSON encoding)
+- total: the whole request as seen by the middleware
+
+Serializers build their data (to_representation) inside the view, before
+rendering: that time is part of total minus db and render, together with
+the rest of the view code.
+
+The numbers go to a Server-Timing header (AIRPORT_SERVER_TIMING) and to the
+"airport.requests" logger as one JSON object per request. Views are held to
+AIRPORT_QUERY_BUDGETS, keyed by URL name ("flight-list") or by method and
+URL name ("POST orders-list") for one action: going over logs a warning, or
+raises QueryBudgetExceeded with AIRPORT_QUERY_BUDGET_STRICT (meant for test
+runs). Streamed responses are measured up to the first byte only.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("airport.requests")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass
+class RequestMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db: float = 0.0
+    render_started: float | None = None
+    render: float = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - start
+
+    def rendered(self, response):
+        # post-render callback of template responses
+        if self.render_started is not None:
+            self.render += time.perf_counter() - self.render_started
+        return response
+
+
+def get_budget(method: str, view_name: str | None) -> dict:
+    """
+    The budget of a view: {"queries": n} and/or {"ms": total}. A plain
+    number in AIRPORT_QUERY_BUDGETS is a query budget.
+    """
+    budgets = getattr(settings, "AIRPORT_QUERY_BUDGETS", {})
+    budget = budgets.get(f"{method} {view_name}", budgets.get(view_name))
+    if budget is None:
+        return {}
+    if isinstance(budget, int):
+        return {"queries": budget}
+    return dict(budget)
+
+
+def _start(metrics: RequestMetrics) -> None:
+    connection.execute_wrappers.append(metrics)
+
+
+def _stop(metrics: RequestMetrics) -> None:
+    connection.execute_wrappers.remove(metrics)
+
+
+class RequestMetricsMiddleware:
+    """
+    Put first in MIDDLEWARE so session and authentication queries count too.
+    Async capable, so it does not push the async views into a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = request._metrics = RequestMetrics()
+        _start(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _stop(metrics)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = request._metrics = RequestMetrics()
+        # the ORM of async views runs in the request's thread-sensitive
+        # thread, the wrapper must sit on that thread's connection
+        await sync_to_async(_start)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_stop)(metrics)
+        return self.finish(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, "_metrics", None)
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(metrics.rendered)
+        return response
+
+    def finish(self, request, response, metrics: RequestMetrics):
+        total = time.perf_counter() - metrics.started
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else None
+        budget = get_budget(request.method, view_name)
+
+        over = []
+        if "queries" in budget and metrics.queries > budget["queries"]:
+            over.append(f"{metrics.queries} queries (budget {budget['queries']})")
+        if "ms" in budget and total * 1000 > budget["ms"]:
+            over.append(f"{total * 1000:.1f} ms (budget {budget['ms']} ms)")
+
+        if getattr(settings, "AIRPORT_SERVER_TIMING", True):
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={metrics.db * 1000:.1f};desc="{metrics.queries} queries"',
+                    f"render;dur={metrics.render * 1000:.1f}",
+                    f"total;dur={total * 1000:.1f}",
+                ]
+            )
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view_name,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db * 1000, 2),
+            "render_ms": round(metrics.render * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+        }
+        if over:
+            record["over_budget"] = over
+            logger.warning(json.dumps(record))
+            if getattr(settings, "AIRPORT_QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(
+                    f"{request.method} {request.path} ({view_name}): {', '.join(over)}"
+                )
+        else:
+            logger.info(json.dumps(record))
+        return response
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0002_flight_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(fields=["departure_time"], name="flight_departure_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(fields=["route", "departure_time"], name="flight_route_departure_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+        ),
+    ]
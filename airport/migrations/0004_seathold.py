@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("airport", "0003_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatHold",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("token", models.UUIDField(db_index=True, default=uuid.uuid4, editable=False)),
+                ("row", models.PositiveIntegerField()),
+                ("seat", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("expires_at", models.DateTimeField()),
+                ("flight", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="seat_holds", to="airport.flight")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="seat_holds", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["flight_id", "row", "seat"],
+                "indexes": [models.Index(fields=["flight", "expires_at"], name="seathold_flight_expires_idx"), models.Index(fields=["expires_at"], name="seathold_expires_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="seathold",
+            constraint=models.UniqueConstraint(fields=("flight", "row", "seat"), name="unique_hold_per_flight_seat"),
+        ),
+    ]
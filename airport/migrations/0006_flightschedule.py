@@ -0,0 +1,63 @@
+import airport.models
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0005_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlightSchedule",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("weekdays", models.PositiveSmallIntegerField(help_text="Bitmask of weekdays: Monday = 1, Tuesday = 2, Wednesday = 4 ... Sunday = 64", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(127)])),
+                ("departure_time", models.TimeField(help_text="Local departure time")),
+                ("duration", models.DurationField()),
+                ("time_zone", models.CharField(blank=True, help_text="IANA time zone of departure_time, the server time zone if empty", max_length=64, validators=[airport.models.validate_time_zone])),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+                ("materialized_until", models.DateField(blank=True, editable=False, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["route_id", "departure_time"],
+            },
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="airplane",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="schedules", to="airport.airplane"),
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="crew",
+            field=models.ManyToManyField(blank=True, related_name="schedules", to="airport.crew"),
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="route",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="schedules", to="airport.route"),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="schedule",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="flights", to="airport.flightschedule"),
+        ),
+        migrations.AddConstraint(
+            model_name="flight",
+            constraint=models.UniqueConstraint(fields=("schedule", "departure_time"), name="unique_flight_per_schedule_departure"),
+        ),
+        migrations.AddConstraint(
+            model_name="flightschedule",
+            constraint=models.CheckConstraint(check=models.Q(("weekdays__gte", 1), ("weekdays__lte", 127)), name="schedule_weekdays_mask"),
+        ),
+        migrations.AddConstraint(
+            model_name="flightschedule",
+            constraint=models.CheckConstraint(check=models.Q(("valid_until__gte", models.F("valid_from"))), name="schedule_valid_until_after_from"),
+        ),
+    ]
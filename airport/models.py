@@ -1,5 +1,9 @@
+import uuid
+import zoneinfo
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
 
@@ -7,6 +11,7 @@ from django.utils import timezone
 class Airport(models.Model):
     name = models.CharField(max_length=255, unique=True)
     closest_big_city = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -27,6 +32,7 @@ class Route(models.Model):
         related_name="routes_to",
     )
     distance = models.PositiveIntegerField(help_text="Distance in km")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["source__name", "destination__name"]
@@ -47,6 +53,7 @@ class Route(models.Model):
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -64,6 +71,7 @@ class Airplane(models.Model):
         on_delete=models.PROTECT,
         related_name="airplanes",
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -79,6 +87,7 @@ class Airplane(models.Model):
 class Crew(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["last_name", "first_name"]
@@ -93,6 +102,69 @@ class Crew(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+def validate_time_zone(value: str) -> None:
+    if value and value not in zoneinfo.available_timezones():
+        raise ValidationError(f"Unknown time zone: {value}.")
+
+
+class FlightSchedule(models.Model):
+    """
+    Recurring flights: the route flown on the weekdays of the mask at a local
+    departure time, between valid_from and valid_until.
+
+    Flights are generated ahead for a rolling window by airport.schedules;
+    materialized_until is the last local date already generated (the day
+    before the first occurrence skipped for a double booking, if any).
+    """
+    MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = (1 << day for day in range(7))
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="schedules",
+    )
+    airplane = models.ForeignKey(
+        Airplane,
+        on_delete=models.PROTECT,
+        related_name="schedules",
+    )
+    crew = models.ManyToManyField(Crew, related_name="schedules", blank=True)
+
+    weekdays = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(127)],
+        help_text="Bitmask of weekdays: Monday = 1, Tuesday = 2, Wednesday = 4 ... Sunday = 64"
+    )
+    departure_time = models.TimeField(help_text="Local departure time")
+    duration = models.DurationField()
+    time_zone = models.CharField(
+        max_length=64,
+        blank=True,
+        validators=[validate_time_zone],
+        help_text="IANA time zone of departure_time, the server time zone if empty",
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["route_id", "departure_time"]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(weekdays__gte=1, weekdays__lte=127),
+                name="schedule_weekdays_mask",
+            ),
+            models.CheckConstraint(
+                check=models.Q(valid_until__gte=models.F("valid_from")),
+                name="schedule_valid_until_after_from",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Schedule #{self.pk} {self.route} at {self.departure_time.isoformat()}"
+
+
 class Flight(models.Model):
     route = models.ForeignKey(
         Route,
@@ -105,17 +177,44 @@ class Flight(models.Model):
         related_name="flights",
     )
     crew = models.ManyToManyField(Crew, related_name="flights", blank=True)
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="flights",
+    )
 
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
 
+    # denormalized ticket count, kept in sync by airport.services/signals
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+
+    # also bumped by bookings and seat holds: availability is part of the flight
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         ordering = ["-departure_time"]
+        indexes = [
+            models.Index(fields=["departure_time"], name="flight_departure_idx"),
+            models.Index(fields=["route", "departure_time"], name="flight_route_departure_idx"),
+            # interval lookups of the double-booking check, see airport.conflicts
+            models.Index(
+                fields=["airplane", "departure_time", "arrival_time"],
+                name="flight_airplane_times_idx",
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(arrival_time__gt=models.F("departure_time")),
                 name="flight_arrival_after_departure",
-            )
+            ),
+            # makes re-running the schedule generator idempotent
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"],
+                name="unique_flight_per_schedule_departure",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -132,6 +231,9 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Order #{self.pk} by {self.user}"
@@ -173,3 +275,47 @@ class Ticket(models.Model):
 
     def __str__(self) -> str:
         return f"Ticket F{self.flight_id} R{self.row} S{self.seat}"
+
+
+class SeatHold(models.Model):
+    """
+    Temporary reservation of a seat before the order is confirmed.
+
+    Seats held together share a token. Expired holds are ignored by every
+    query (expires_at > now) and deleted by the sweep_seat_holds command.
+    """
+    token = models.UUIDField(default=uuid.uuid4, editable=False, db_index=True)
+    row = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    flight = models.ForeignKey(
+        Flight,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["flight_id", "row", "seat"]
+        indexes = [
+            models.Index(fields=["flight", "expires_at"], name="seathold_flight_expires_idx"),
+            models.Index(fields=["expires_at"], name="seathold_expires_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["flight", "row", "seat"],
+                name="unique_hold_per_flight_seat",
+            ),
+        ]
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= timezone.now()
+
+    def __str__(self) -> str:
+        return f"Hold F{self.flight_id} R{self.row} S{self.seat} until {self.expires_at.isoformat()}"
@@ -0,0 +1,36 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: every page is a range scan starting at the
+    last seen value, so deep pages cost the same as the first one.
+
+    Subclasses declare the ordering (matching the model's Meta.ordering) and
+    the page size bounds.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        # "id" is appended as a tie-breaker so rows sharing the same
+        # timestamp are always returned in a stable order.
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            tie_breaker = "-id" if ordering[0].startswith("-") else "id"
+            ordering = (*ordering, tie_breaker)
+        return ordering
+
+
+class FlightPagination(KeysetPagination):
+    ordering = ("-departure_time", "-id")
+    page_size = 50
+    max_page_size = 200
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    max_page_size = 100
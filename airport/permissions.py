@@ -1,3 +1,6 @@
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 
@@ -10,3 +13,19 @@ class IsAdminOrReadOnly(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         return bool(request.user and request.user.is_staff)
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Open when AIRPORT_METRICS_TOKEN is empty (development only, production
+    settings require it), otherwise requires the header
+    "Authorization: Bearer <AIRPORT_METRICS_TOKEN>".
+    """
+
+    def has_permission(self, request, view) -> bool:
+        token = getattr(settings, "AIRPORT_METRICS_TOKEN", "")
+        if not token:
+            return True
+        return hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+        )
@@ -0,0 +1,60 @@
+import json
+
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Lets content negotiation (?format=, Accept) pick an export format.
+
+    Export views stream their rows in a StreamingHttpResponse themselves, so
+    the renderer is only used for error responses (401, 403, 404), which are
+    written as a JSON object.
+    """
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data).encode(self.charset)
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    An Accept header that matches no export renderer (application/json from
+    a generic client) gets the first one, NDJSON, instead of 406. An unknown
+    ?format= is still a 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            return renderers[0], renderers[0].media_type
+
+
+class PrometheusRenderer(BaseRenderer):
+    """
+    Text exposition format for /metrics. The view renders the text itself
+    (airport.metrics), anything else (error responses) is written as JSON.
+    """
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return json.dumps(data).encode(self.charset)
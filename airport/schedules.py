@@ -0,0 +1,216 @@
+"""
+Generation of Flight rows from FlightSchedule patterns.
+
+Generation is incremental: a schedule remembers the last local date it was
+materialized for and the next run starts the day after, so moving the
+rolling window forward only inserts the new days. Flights are unique per
+(schedule, departure_time) and existing ones are skipped, so a re-run never
+duplicates them.
+
+Generated flights go through the same double-booking check as the ones
+created through the API (airport.conflicts): an occurrence whose airplane or
+crew is already on another flight is skipped and logged, and
+materialized_until stops the day before it, so the next run tries it again
+(the flights after it exist already and are skipped).
+
+Editing the pattern of a schedule regenerates its future flights
+(reschedule).
+"""
+from __future__ import annotations
+
+import logging
+import zoneinfo
+from datetime import date, datetime, timedelta, timezone as dt_timezone, tzinfo
+from functools import partial
+from typing import Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from airport.conflicts import find_conflicts
+from airport.connections import connection_index
+from airport.models import Flight, FlightSchedule
+
+logger = logging.getLogger(__name__)
+
+# the fields the generated flights are derived from
+PATTERN_FIELDS = (
+    "route_id",
+    "airplane_id",
+    "weekdays",
+    "departure_time",
+    "duration",
+    "time_zone",
+    "valid_from",
+    "valid_until",
+)
+
+
+def schedule_time_zone(schedule: FlightSchedule) -> tzinfo:
+    if schedule.time_zone:
+        return zoneinfo.ZoneInfo(schedule.time_zone)
+    return timezone.get_default_timezone()
+
+
+def window_end(schedule: FlightSchedule) -> date:
+    today = datetime.now(schedule_time_zone(schedule)).date()
+    return today + timedelta(days=getattr(settings, "AIRPORT_SCHEDULE_WINDOW_DAYS", 60))
+
+
+def occurrences(
+    schedule: FlightSchedule, start: date, end: date
+) -> Iterator[tuple[datetime, datetime]]:
+    """(departure, arrival) in UTC of the flights on local dates start..end."""
+    tz = schedule_time_zone(schedule)
+    day = max(start, schedule.valid_from)
+    last = min(end, schedule.valid_until)
+    while day <= last:
+        if schedule.weekdays & (1 << day.weekday()):
+            # the duration is added in UTC, a DST change mid-flight must not move the arrival
+            departure = datetime.combine(day, schedule.departure_time, tzinfo=tz).astimezone(
+                dt_timezone.utc
+            )
+            yield departure, departure + schedule.duration
+        day += timedelta(days=1)
+
+
+def materialize_schedule(schedule: FlightSchedule, *, until: date | None = None) -> list[Flight]:
+    """
+    Creates the flights of the schedule that do not exist yet, from the day
+    after materialized_until (or today) up to `until`, the end of the
+    rolling window by default. Returns the created flights.
+    """
+    with transaction.atomic():
+        # concurrent runs for one schedule wait for each other
+        schedule = FlightSchedule.objects.select_for_update().get(pk=schedule.pk)
+        today = datetime.now(schedule_time_zone(schedule)).date()
+        start = max(today, schedule.valid_from)
+        if schedule.materialized_until is not None:
+            start = max(start, schedule.materialized_until + timedelta(days=1))
+        end = min(until or window_end(schedule), schedule.valid_until)
+        if start > end:
+            return []
+
+        times = list(occurrences(schedule, start, end))
+        existing = set()
+        if times:
+            existing = set(
+                schedule.flights.filter(
+                    departure_time__gte=times[0][0], departure_time__lte=times[-1][0]
+                ).values_list("departure_time", flat=True)
+            )
+        times = [(departure, arrival) for departure, arrival in times if departure not in existing]
+
+        crew_ids = list(schedule.crew.values_list("pk", flat=True))
+        errors = find_conflicts(
+            [
+                {
+                    "pk": None,
+                    "airplane_id": schedule.airplane_id,
+                    "crew_ids": crew_ids,
+                    "departure_time": departure,
+                    "arrival_time": arrival,
+                }
+                for departure, arrival in times
+            ]
+        )
+        skipped = [departure for (departure, _), error in zip(times, errors) if error]
+        for (departure, _), error in zip(times, errors):
+            if error:
+                messages = [message for field_errors in error.values() for message in field_errors]
+                logger.warning(
+                    "Schedule %s: skipped the flight of %s, %s",
+                    schedule.pk,
+                    departure.isoformat(),
+                    " ".join(messages),
+                )
+
+        flights = Flight.objects.bulk_create(
+            [
+                Flight(
+                    schedule=schedule,
+                    route_id=schedule.route_id,
+                    airplane_id=schedule.airplane_id,
+                    departure_time=departure,
+                    arrival_time=arrival,
+                )
+                for (departure, arrival), error in zip(times, errors)
+                if not error
+            ],
+            batch_size=getattr(settings, "AIRPORT_BULK_BATCH_SIZE", 1000),
+        )
+
+        if flights and crew_ids:
+            through = Flight.crew.through
+            through.objects.bulk_create(
+                [
+                    through(flight_id=flight.pk, crew_id=crew_id)
+                    for flight in flights
+                    for crew_id in crew_ids
+                ],
+                batch_size=getattr(settings, "AIRPORT_BULK_BATCH_SIZE", 1000),
+            )
+
+        schedule.materialized_until = end
+        if skipped:
+            tz = schedule_time_zone(schedule)
+            schedule.materialized_until = min(
+                end, skipped[0].astimezone(tz).date() - timedelta(days=1)
+            )
+        schedule.save(update_fields=["materialized_until"])
+
+        # bulk_create sends no post_save, see airport.signals.flight_saved
+        if flights:
+            transaction.on_commit(
+                partial(connection_index.refresh_flights, [flight.pk for flight in flights])
+            )
+    return flights
+
+
+def schedule_pattern(schedule: FlightSchedule) -> tuple:
+    """What the generated flights of the schedule depend on, to detect edits."""
+    crew_ids = sorted(schedule.crew.values_list("pk", flat=True))
+    return tuple(getattr(schedule, name) for name in PATTERN_FIELDS) + (tuple(crew_ids),)
+
+
+def reschedule(schedule: FlightSchedule) -> list[Flight]:
+    """
+    Regenerates the future flights of an edited schedule up to the date of
+    its last generated flight (materialized_until stops before a skipped
+    occurrence, the later flights exist too). Flights with sold tickets are kept as they are,
+    the others are deleted and generated again from the new pattern.
+    Returns the created flights.
+    """
+    with transaction.atomic():
+        schedule = FlightSchedule.objects.select_for_update().get(pk=schedule.pk)
+        until = schedule.materialized_until
+        last = (
+            schedule.flights.order_by("-departure_time")
+            .values_list("departure_time", flat=True)
+            .first()
+        )
+        if last is not None:
+            last_day = last.astimezone(schedule_time_zone(schedule)).date()
+            until = last_day if until is None else max(until, last_day)
+        # a QuerySet delete() sends post_delete, see airport.signals.flight_deleted
+        schedule.flights.filter(departure_time__gt=timezone.now(), tickets__isnull=True).delete()
+        schedule.materialized_until = None
+        schedule.save(update_fields=["materialized_until"])
+        if until is None:
+            return []
+        return materialize_schedule(schedule, until=until)
+
+
+def materialize_schedules(*, until: date | None = None, schedule_ids=None) -> int:
+    """Materializes every schedule that is still valid, returns the number of new flights."""
+    # a day of slack: the schedule's own time zone may be behind the server's
+    schedules = FlightSchedule.objects.filter(
+        valid_until__gte=timezone.localdate() - timedelta(days=1)
+    )
+    if schedule_ids:
+        schedules = schedules.filter(pk__in=schedule_ids)
+    return sum(
+        len(materialize_schedule(schedule, until=until))
+        for schedule in list(schedules.order_by("pk"))
+    )
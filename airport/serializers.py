@@ -1,5 +1,11 @@
+import operator
+
+from django.db.models import prefetch_related_objects
+
 from rest_framework import serializers
 
+from airport.bulk import BulkListSerializer, PreloadedPrimaryKeyRelatedField
+from airport.conflicts import find_conflicts
 from airport.models import (
     Airport,
     Route,
@@ -7,28 +13,30 @@ from airport.models import (
     Airplane,
     Crew,
     Flight,
+    FlightSchedule,
     Order,
     Ticket,
 )
-from airport.services import create_order_with_tickets, SeatBookingError
+from airport.services import create_order_with_tickets, hold_seats, SeatBookingError
+from airport.sparse import Computed, Nested, Selection, SparseFieldsMixin, compile_shape
 
 
-class AirportSerializer(serializers.ModelSerializer):
+class AirportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Airport
         fields = ("id", "name", "closest_big_city")
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     source = AirportSerializer(read_only=True)
     destination = AirportSerializer(read_only=True)
 
-    source_id = serializers.PrimaryKeyRelatedField(
+    source_id = PreloadedPrimaryKeyRelatedField(
         source="source",
         queryset=Airport.objects.all(),
         write_only=True,
     )
-    destination_id = serializers.PrimaryKeyRelatedField(
+    destination_id = PreloadedPrimaryKeyRelatedField(
         source="destination",
         queryset=Airport.objects.all(),
         write_only=True,
@@ -44,15 +52,23 @@ class RouteSerializer(serializers.ModelSerializer):
             "destination_id",
             "distance",
         )
+        list_serializer_class = BulkListSerializer
+
+    def validate(self, attrs):
+        source = attrs.get("source", getattr(self.instance, "source", None))
+        destination = attrs.get("destination", getattr(self.instance, "destination", None))
+        if source is not None and source == destination:
+            raise serializers.ValidationError("Source and destination must be different airports.")
+        return attrs
 
 
-class AirplaneTypeSerializer(serializers.ModelSerializer):
+class AirplaneTypeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AirplaneType
         fields = ("id", "name")
 
 
-class AirplaneSerializer(serializers.ModelSerializer):
+class AirplaneSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     airplane_type = AirplaneTypeSerializer(read_only=True)
     airplane_type_id = serializers.PrimaryKeyRelatedField(
         source="airplane_type",
@@ -74,27 +90,96 @@ class AirplaneSerializer(serializers.ModelSerializer):
         )
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Crew
         fields = ("id", "first_name", "last_name")
 
 
-class FlightListSerializer(serializers.ModelSerializer):
+class FlightListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     route = RouteSerializer(read_only=True)
     airplane = AirplaneSerializer(read_only=True)
 
+    # annotated by FlightViewSet.get_queryset
+    taken_seats = serializers.IntegerField(read_only=True)
+    seats_available = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Flight
-        fields = ("id", "route", "airplane", "departure_time", "arrival_time")
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "departure_time",
+            "arrival_time",
+            "taken_seats",
+            "seats_available",
+        )
+
+
+def _airport_shape(prefix: str) -> dict:
+    return {
+        "id": f"{prefix}_id",
+        "name": f"{prefix}__name",
+        "closest_big_city": f"{prefix}__closest_big_city",
+    }
+
+
+_to_datetime = serializers.DateTimeField().to_representation
+
+# FlightListSerializer's representation in terms of values() columns, one
+# query over the joined tables; only the selected part is read and built.
+FLIGHT_LIST_SHAPE = {
+    "id": "id",
+    "route": Nested(
+        "route_id",
+        {
+            "id": "route_id",
+            "source": Nested("route__source_id", _airport_shape("route__source")),
+            "destination": Nested("route__destination_id", _airport_shape("route__destination")),
+            "distance": "route__distance",
+        },
+    ),
+    "airplane": Nested(
+        "airplane_id",
+        {
+            "id": "airplane_id",
+            "name": "airplane__name",
+            "rows": "airplane__rows",
+            "seats_in_row": "airplane__seats_in_row",
+            "capacity": Computed(operator.mul, ("airplane__rows", "airplane__seats_in_row")),
+            "airplane_type": Nested(
+                "airplane__airplane_type_id",
+                {"id": "airplane__airplane_type_id", "name": "airplane__airplane_type__name"},
+            ),
+        },
+    ),
+    "departure_time": Computed(_to_datetime, ("departure_time",)),
+    "arrival_time": Computed(_to_datetime, ("arrival_time",)),
+    "taken_seats": "taken_seats",
+    "seats_available": "seats_available",
+}
+
+# Columns of the full representation.
+FLIGHT_LIST_VALUES, _build_flight = compile_shape(FLIGHT_LIST_SHAPE, Selection())
+
+
+def flight_list_data(rows, build=_build_flight) -> list[dict]:
+    """
+    Read path of FlightListSerializer: builds the same representation (same
+    keys, same order, same datetime format) straight from FLIGHT_LIST_VALUES
+    rows, without going through DRF's field machinery per flight. build
+    comes from compile_shape for a ?fields=/?expand= selection.
+    """
+    return [build(row) for row in rows]
 
 
-class FlightDetailSerializer(serializers.ModelSerializer):
+class FlightDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     route = RouteSerializer(read_only=True)
     airplane = AirplaneSerializer(read_only=True)
 
     crew = CrewSerializer(many=True, read_only=True)
-    crew_ids = serializers.PrimaryKeyRelatedField(
+    crew_ids = PreloadedPrimaryKeyRelatedField(
         source="crew",
         many=True,
         queryset=Crew.objects.all(),
@@ -102,18 +187,20 @@ class FlightDetailSerializer(serializers.ModelSerializer):
         required=False,
     )
 
-    route_id = serializers.PrimaryKeyRelatedField(
+    # related objects are rendered back in the response
+    route_id = PreloadedPrimaryKeyRelatedField(
         source="route",
-        queryset=Route.objects.all(),
+        queryset=Route.objects.select_related("source", "destination"),
         write_only=True,
     )
-    airplane_id = serializers.PrimaryKeyRelatedField(
+    airplane_id = PreloadedPrimaryKeyRelatedField(
         source="airplane",
-        queryset=Airplane.objects.all(),
+        queryset=Airplane.objects.select_related("airplane_type"),
         write_only=True,
     )
 
     taken_seats = serializers.SerializerMethodField()
+    seats_available = serializers.SerializerMethodField()
 
     class Meta:
         model = Flight
@@ -128,10 +215,140 @@ class FlightDetailSerializer(serializers.ModelSerializer):
             "departure_time",
             "arrival_time",
             "taken_seats",
+            "seats_available",
+        )
+        list_serializer_class = BulkListSerializer
+
+    def validate(self, attrs):
+        departure = attrs.get("departure_time", getattr(self.instance, "departure_time", None))
+        arrival = attrs.get("arrival_time", getattr(self.instance, "arrival_time", None))
+        if departure and arrival and arrival <= departure:
+            raise serializers.ValidationError("Arrival time must be after departure time.")
+        # bulk payloads are checked all at once by validate_items()
+        if not isinstance(self.parent, serializers.ListSerializer):
+            errors = self.validate_items([attrs], [self.instance])[0]
+            if errors:
+                raise serializers.ValidationError(errors)
+        return attrs
+
+    def validate_items(self, items: list[dict], instances: list) -> list[dict]:
+        """Airplane and crew double-booking check, see airport.conflicts."""
+        # the stored crew of the updated flights that keep it, one query for all
+        prefetch_related_objects(
+            [
+                instance
+                for attrs, instance in zip(items, instances)
+                if instance is not None and "crew" not in attrs
+            ],
+            "crew",
         )
+        planned = []
+        for attrs, instance in zip(items, instances):
+            # partial updates keep the stored values of the fields not sent
+            if instance is None:
+                attrs = {"crew": [], **attrs}
+            else:
+                attrs = {
+                    "departure_time": instance.departure_time,
+                    "arrival_time": instance.arrival_time,
+                    **attrs,
+                }
+            airplane = attrs.get("airplane")
+            crew = attrs["crew"] if "crew" in attrs else instance.crew.all()
+            planned.append(
+                {
+                    "pk": getattr(instance, "pk", None),
+                    "airplane_id": instance.airplane_id if airplane is None else airplane.pk,
+                    "crew_ids": [member.pk for member in crew],
+                    "departure_time": attrs["departure_time"],
+                    "arrival_time": attrs["arrival_time"],
+                }
+            )
+        return find_conflicts(planned)
+
+    # annotated for reads (sold + held), computed for freshly created/updated flights
 
     def get_taken_seats(self, obj: Flight) -> int:
-        return obj.tickets.count()
+        return getattr(obj, "taken_seats", obj.tickets_sold)
+
+    def get_seats_available(self, obj: Flight) -> int:
+        if not hasattr(obj, "seats_available"):
+            obj.seats_available = obj.airplane.capacity - self.get_taken_seats(obj)
+        return obj.seats_available
+
+
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlightSchedule
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "crew",
+            "weekdays",
+            "departure_time",
+            "duration",
+            "time_zone",
+            "valid_from",
+            "valid_until",
+            "materialized_until",
+        )
+        read_only_fields = ("materialized_until",)
+
+    def validate(self, attrs):
+        valid_from = attrs.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = attrs.get("valid_until", getattr(self.instance, "valid_until", None))
+        if valid_from and valid_until and valid_until < valid_from:
+            raise serializers.ValidationError("valid_until must not be before valid_from.")
+        return attrs
+
+
+class MaterializeScheduleSerializer(serializers.Serializer):
+    until = serializers.DateField(
+        required=False, help_text="Last local date to generate, the rolling window by default"
+    )
+    created = serializers.IntegerField(read_only=True)
+    materialized_until = serializers.DateField(read_only=True)
+
+
+class SeatMapSerializer(serializers.Serializer):
+    """
+    Seat map of a flight: one string per row, "1" - sold or held, "0" - free.
+    """
+    flight = serializers.IntegerField()
+    rows = serializers.IntegerField()
+    seats_in_row = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    taken_seats = serializers.IntegerField()
+    held_seats = serializers.IntegerField()
+    seats_available = serializers.IntegerField()
+    seats = serializers.ListField(child=serializers.CharField())
+
+
+class ConnectionSearchSerializer(serializers.Serializer):
+    """
+    Query parameters of the connection search: ?from=&to=&date=&max_legs=
+    """
+    to = serializers.IntegerField(min_value=1, help_text="Destination airport id")
+    date = serializers.DateField(required=False, help_text="Departure date, today by default")
+    max_legs = serializers.IntegerField(min_value=1, max_value=4, default=2)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # "from" is a Python keyword, so it cannot be declared as an attribute
+        fields["from"] = serializers.IntegerField(min_value=1, help_text="Source airport id")
+        return fields
+
+    def validate(self, attrs):
+        if attrs["from"] == attrs["to"]:
+            raise serializers.ValidationError("'from' and 'to' must be different airports.")
+        return attrs
+
+
+class ResponseCacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_ratio = serializers.FloatField(allow_null=True)
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -142,21 +359,45 @@ class TicketSerializer(serializers.ModelSerializer):
         read_only_fields = ("flight",)
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=True)
+class FlightSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Flight of a ticket in ?expand=tickets.flight order responses."""
+    source = serializers.CharField(source="route.source.name", read_only=True)
+    destination = serializers.CharField(source="route.destination.name", read_only=True)
+
+    class Meta:
+        model = Flight
+        fields = ("id", "route", "source", "destination", "departure_time", "arrival_time")
+        read_only_fields = fields
+
+
+class TicketFlightSerializer(SparseFieldsMixin, TicketSerializer):
+    flight = FlightSummarySerializer(read_only=True)
+
+
+# tickets with the id of their flight, ?expand=tickets.flight for a summary
+ORDER_DEFAULT_EXPAND = frozenset({"tickets"})
+
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    tickets = TicketFlightSerializer(many=True, read_only=True)
 
     class Meta:
         model = Order
         fields = ("id", "created_at", "tickets")
         read_only_fields = ("created_at",)
 
+    def get_selection(self) -> Selection:
+        # also without a view selection, e.g. the order of a confirmed hold
+        return super().get_selection() or Selection(expand=ORDER_DEFAULT_EXPAND)
+
 
 class OrderCreateSerializer(serializers.ModelSerializer):
     """
     Creates an order and books seats for a specific flight.
     """
     flight_id = serializers.PrimaryKeyRelatedField(
-        queryset=Flight.objects.all(),
+        # airplane is needed for the seat bounds check
+        queryset=Flight.objects.select_related("airplane"),
         write_only=True,
     )
     seats = serializers.ListField(
@@ -189,3 +430,47 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"seats": str(e)}) from e
 
         return order
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    """
+    Holds seats of a flight for a few minutes before the order is confirmed.
+    """
+    token = serializers.UUIDField(read_only=True)
+    flight_id = serializers.PrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane"),
+        write_only=True,
+    )
+    flight = serializers.IntegerField(read_only=True)
+    seats = serializers.ListField(
+        child=serializers.DictField(child=serializers.IntegerField()),
+        allow_empty=False,
+    )
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate_seats(self, seats):
+        for s in seats:
+            if "row" not in s or "seat" not in s:
+                raise serializers.ValidationError("Each seat must contain 'row' and 'seat'.")
+        return seats
+
+    def create(self, validated_data):
+        try:
+            holds = hold_seats(
+                user=self.context["request"].user,
+                flight=validated_data["flight_id"],
+                seats=validated_data["seats"],
+            )
+        except SeatBookingError as e:
+            raise serializers.ValidationError({"seats": str(e)}) from e
+        return seat_hold_data(holds)
+
+
+def seat_hold_data(holds) -> dict:
+    """Groups the SeatHold rows sharing one token into a single object."""
+    return {
+        "token": holds[0].token,
+        "flight": holds[0].flight_id,
+        "expires_at": holds[0].expires_at,
+        "seats": [{"row": hold.row, "seat": hold.seat} for hold in holds],
+    }
@@ -1,29 +1,72 @@
 from __future__ import annotations
 
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
 from typing import Iterable
 
-from django.db import IntegrityError, transaction
-from django.core.exceptions import ValidationError as DjangoValidationError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import (
+    Count,
+    DateTimeField,
+    F,
+    IntegerField,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from airport.models import Order, Ticket, Flight
+from airport import metrics
+from airport.models import Order, Ticket, Flight, SeatHold
+
+SEAT_MAP_CACHE_KEY = "airport:seat-map:{flight_id}"
+
+
+BOOKING_LOCK_MODES = ("none", "row", "advisory")
+
+# lock_not_available, deadlock_detected, serialization_failure
+TRANSIENT_SQLSTATES = frozenset({"55P03", "40P01", "40001"})
+TRANSIENT_SQLITE_MESSAGES = ("database is locked", "database table is locked")
 
 
 class SeatBookingError(Exception):
     """Raised when booking seats fails due to validation or conflicts."""
 
 
-@transaction.atomic
-def create_order_with_tickets(*, user, flight: Flight, seats: Iterable[dict]) -> Order:
-    """
-    Creates an order and books seats (tickets) for a given flight.
+class SeatConflictError(SeatBookingError):
+    """Raised when requested seats are already taken."""
 
-    seats: iterable of {"row": int, "seat": int}
 
-    Validations:
+class FlightBusyError(SeatConflictError):
+    """Raised when the flight stays locked by concurrent bookings after all retries."""
+
+
+class SeatHoldError(SeatBookingError):
+    """Raised when a seat hold does not exist or has expired."""
+
+
+def validate_requested_seats(
+    flight: Flight,
+    seats: Iterable[dict],
+    *,
+    hold_token: uuid.UUID | None = None,
+) -> set[tuple[int, int]]:
+    """
+    Validates requested seats set-wise and returns them as {(row, seat), ...}.
+
     - no duplicates in request
     - bounds: 1..rows and 1..seats_in_row
-    - already taken seats are not allowed
-    - atomic transaction
+    - already taken seats are not allowed (single query + set intersection)
+    - seats held by active holds are not allowed, except the hold_token ones
+
+    The number of queries does not depend on the number of seats.
     """
     requested = []
     for s in seats:
@@ -52,36 +95,391 @@ def create_order_with_tickets(*, user, flight: Flight, seats: Iterable[dict]) ->
             raise SeatBookingError(f"Seat {seat} is out of range for airplane {airplane.name}.")
 
     # check already taken seats (single query + set intersection)
-    rows = [r for r, _ in requested_set]
+    rows = {r for r, _ in requested_set}
     existing = set(
         Ticket.objects.filter(flight=flight, row__in=rows).values_list("row", "seat")
     )
+    existing.update(
+        SeatHold.objects.filter(flight=flight, row__in=rows, expires_at__gt=timezone.now())
+        .exclude(token=hold_token)
+        .values_list("row", "seat")
+    )
     taken = requested_set.intersection(existing)
     if taken:
         taken_sorted = sorted(taken)
-        raise SeatBookingError(f"Some seats are already taken: {taken_sorted}")
+        raise SeatConflictError(f"Some seats are already taken: {taken_sorted}")
 
-    order = Order.objects.create(user=user)
+    return requested_set
 
-    tickets = []
-    for row, seat in requested_set:
-        ticket = Ticket(
+
+def lock_flight(flight: Flight, mode: str) -> None:
+    """
+    Serializes bookings of one flight for the rest of the current transaction.
+
+    - "row": SELECT ... FOR UPDATE on the flight row
+    - "advisory": pg_advisory_xact_lock(flight id), row lock on other databases
+
+    SQLite has no row locks: a no-op UPDATE of the flight takes the database
+    write lock up front instead, so competing bookings wait for it rather
+    than failing at commit.
+    """
+    if mode == "none":
+        return
+    if mode not in BOOKING_LOCK_MODES:
+        raise ValueError(f"Unknown booking lock mode: {mode!r}")
+
+    if connection.vendor == "sqlite":
+        Flight.objects.filter(pk=flight.pk).update(tickets_sold=F("tickets_sold"))
+    elif mode == "advisory" and connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [flight.pk])
+    else:
+        list(Flight.objects.select_for_update().filter(pk=flight.pk).values_list("pk"))
+
+
+def create_order_with_tickets(
+    *,
+    user,
+    flight: Flight,
+    seats: Iterable[dict],
+    lock: str | None = None,
+    retries: int | None = None,
+    hold_token: uuid.UUID | None = None,
+) -> Order:
+    """
+    Creates an order and books seats (tickets) for a given flight.
+
+    seats: iterable of {"row": int, "seat": int}
+
+    Seats are validated once for the whole request (validate_requested_seats),
+    tickets are inserted with a single bulk_create without per-ticket
+    full_clean(); the unique_ticket_per_flight_seat constraint guards against
+    concurrent bookings. Runs in an atomic transaction.
+
+    lock/retries default to AIRPORT_BOOKING_LOCK ("none") and
+    AIRPORT_BOOKING_RETRIES (0). With a lock, the flight is locked before the
+    taken-seats check (see lock_flight); transient database errors (lock
+    timeouts, deadlocks, "database is locked") are retried with jittered
+    exponential backoff, unless the call is nested in an outer transaction.
+    Other database errors are not caught (see is_transient_error).
+
+    hold_token confirms a seat hold: its seats are not treated as taken and
+    the hold is deleted together with the order creation.
+    """
+    if lock is None:
+        lock = getattr(settings, "AIRPORT_BOOKING_LOCK", "none")
+    if retries is None:
+        retries = getattr(settings, "AIRPORT_BOOKING_RETRIES", 0)
+    seats = list(seats)
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        order = _create_order_with_retries(
+            user=user,
             flight=flight,
-            order=order,
-            row=row,
-            seat=seat,
+            seats=seats,
+            lock=lock,
+            retries=retries,
+            hold_token=hold_token,
         )
-        # Ticket.clean() checks bounds using flight.airplane (extra safety)
+    except FlightBusyError:
+        outcome = "busy"
+        raise
+    except SeatConflictError:
+        outcome = "conflict"
+        raise
+    except SeatBookingError:
+        outcome = "validation"
+        raise
+    else:
+        outcome = "success"
+        metrics.BOOKING_SEATS.observe(len(seats))
+        return order
+    finally:
+        metrics.BOOKINGS.inc(outcome=outcome)
+        metrics.BOOKING_DURATION.observe(time.perf_counter() - started, outcome=outcome)
+
+
+def _create_order_with_retries(
+    *,
+    user,
+    flight: Flight,
+    seats: list[dict],
+    lock: str,
+    retries: int,
+    hold_token: uuid.UUID | None,
+) -> Order:
+    attempt = 0
+    while True:
         try:
-            ticket.full_clean()
-        except DjangoValidationError as e:
-            raise SeatBookingError(str(e.message_dict)) from e
-        tickets.append(ticket)
+            with transaction.atomic():
+                return _create_order_with_tickets(
+                    user=user, flight=flight, seats=seats, lock=lock, hold_token=hold_token
+                )
+        except OperationalError as e:
+            if not is_transient_error(e):
+                raise
+            if attempt >= retries or connection.in_atomic_block:
+                raise FlightBusyError("Flight is busy, please try again.") from e
+            attempt += 1
+            backoff = getattr(settings, "AIRPORT_BOOKING_RETRY_BACKOFF", 0.05)
+            time.sleep(random.uniform(0, backoff * 2 ** attempt))
+
+
+def is_transient_error(error: OperationalError) -> bool:
+    """
+    Whether a database error is worth retrying: a lock timeout, a deadlock,
+    a serialization failure or SQLite's "database is locked". Anything else
+    (lost connection, bad SQL, ...) is a server error.
+    """
+    cause = error.__cause__ or error
+    # psycopg 3: sqlstate, psycopg2: pgcode
+    sqlstate = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    if sqlstate is not None:
+        return sqlstate in TRANSIENT_SQLSTATES
+    message = str(cause).lower()
+    return any(text in message for text in TRANSIENT_SQLITE_MESSAGES)
+
+
+def _create_order_with_tickets(
+    *,
+    user,
+    flight: Flight,
+    seats: list[dict],
+    lock: str,
+    hold_token: uuid.UUID | None,
+) -> Order:
+    lock_flight(flight, lock)
+
+    requested_set = validate_requested_seats(flight, seats, hold_token=hold_token)
+
+    order = Order.objects.create(user=user)
+
+    tickets = [
+        Ticket(flight=flight, order=order, row=row, seat=seat)
+        for row, seat in sorted(requested_set)
+    ]
 
     try:
         Ticket.objects.bulk_create(tickets)
     except IntegrityError as e:
         # DB unique constraint fallback (race condition safety)
-        raise SeatBookingError("One or more seats are already taken.") from e
+        raise SeatConflictError("One or more seats are already taken.") from e
+
+    # same transaction as the tickets: the counter never drifts from them
+    Flight.objects.filter(pk=flight.pk).update(
+        tickets_sold=F("tickets_sold") + len(tickets), updated_at=timezone.now()
+    )
+
+    if lock == "none":
+        # the update waited for the flight lock of a concurrent hold_seats:
+        # holds committed since validate_requested_seats are visible now
+        held = requested_set.intersection(
+            SeatHold.objects.filter(
+                flight=flight,
+                row__in={row for row, _ in requested_set},
+                expires_at__gt=timezone.now(),
+            )
+            .exclude(token=hold_token)
+            .values_list("row", "seat")
+        )
+        if held:
+            raise SeatConflictError(f"Some seats are already taken: {sorted(held)}")
+
+    if hold_token is not None:
+        SeatHold.objects.filter(token=hold_token).delete()
+
+    transaction.on_commit(partial(invalidate_seat_map, flight.pk))
 
     return order
+
+
+def hold_seats(*, user, flight: Flight, seats: Iterable[dict], minutes: int | None = None) -> list[SeatHold]:
+    """
+    Holds seats of a flight for AIRPORT_SEAT_HOLD_MINUTES (or `minutes`).
+
+    Returns the created holds, all sharing one token. Seats that are sold or
+    held by an active hold are rejected like in create_order_with_tickets.
+
+    The flight is locked whatever AIRPORT_BOOKING_LOCK says: the update of
+    its updated_at comes first and holds the row lock (the write lock on
+    SQLite) until commit. A booking without a lock re-checks the holds once
+    its own update of the flight has waited for it, so a hold and a booking
+    of one seat cannot both succeed.
+    """
+    if minutes is None:
+        minutes = getattr(settings, "AIRPORT_SEAT_HOLD_MINUTES", 10)
+    lock = getattr(settings, "AIRPORT_BOOKING_LOCK", "none")
+
+    with transaction.atomic():
+        if lock == "advisory":
+            lock_flight(flight, lock)
+        now = timezone.now()
+        # availability shown for the flight changes; doubles as the row lock
+        Flight.objects.filter(pk=flight.pk).update(updated_at=now)
+        # sold seats are checked after the lock, bookings that held it are committed
+        requested_set = validate_requested_seats(flight, seats)
+
+        # expired holds on these rows still occupy unique_hold_per_flight_seat
+        SeatHold.objects.filter(
+            flight=flight,
+            row__in={row for row, _ in requested_set},
+            expires_at__lte=now,
+        ).delete()
+
+        token = uuid.uuid4()
+        holds = [
+            SeatHold(
+                token=token,
+                flight=flight,
+                user=user,
+                row=row,
+                seat=seat,
+                created_at=now,
+                expires_at=now + timedelta(minutes=minutes),
+            )
+            for row, seat in sorted(requested_set)
+        ]
+        try:
+            with transaction.atomic():
+                SeatHold.objects.bulk_create(holds)
+        except IntegrityError as e:
+            raise SeatConflictError("One or more seats are already held.") from e
+
+        transaction.on_commit(partial(invalidate_seat_map, flight.pk))
+
+    return holds
+
+
+def get_seat_hold(*, user, token: uuid.UUID) -> list[SeatHold]:
+    holds = list(SeatHold.objects.filter(user=user, token=token).select_related("flight__airplane"))
+    if not holds:
+        raise SeatHoldError("Seat hold not found.")
+    return holds
+
+
+def confirm_seat_hold(*, user, token: uuid.UUID) -> Order:
+    """Turns an active seat hold into an order with tickets."""
+    holds = get_seat_hold(user=user, token=token)
+    if holds[0].is_expired:
+        raise SeatHoldError("Seat hold has expired.")
+
+    return create_order_with_tickets(
+        user=user,
+        flight=holds[0].flight,
+        seats=[{"row": hold.row, "seat": hold.seat} for hold in holds],
+        hold_token=token,
+    )
+
+
+def release_seat_hold(*, user, token: uuid.UUID) -> None:
+    holds = get_seat_hold(user=user, token=token)
+    with transaction.atomic():
+        SeatHold.objects.filter(user=user, token=token).delete()
+        Flight.objects.filter(pk=holds[0].flight_id).update(updated_at=timezone.now())
+    invalidate_seat_map(holds[0].flight_id)
+
+
+def _read_seat_map(flight: Flight) -> tuple[dict, datetime | None]:
+    """
+    Reads sold and actively held seats of a flight in a single query.
+
+    Returns the seat map and the expiry of the earliest active hold, after
+    which the map is out of date.
+    """
+    airplane = flight.airplane
+    seats_in_row = airplane.seats_in_row
+    bitmap = bytearray(b"0" * (airplane.rows * seats_in_row))
+
+    sold = Ticket.objects.filter(flight=flight).order_by().values_list(
+        "row", "seat", Value(None, output_field=DateTimeField())
+    )
+    held = SeatHold.objects.filter(
+        flight=flight, expires_at__gt=timezone.now()
+    ).order_by().values_list("row", "seat", "expires_at")
+
+    taken = held_count = 0
+    next_expiry = None
+    for row, seat, expires_at in sold.union(held, all=True):
+        bitmap[(row - 1) * seats_in_row + seat - 1] = ord("1")
+        taken += 1
+        if expires_at is not None:
+            held_count += 1
+            if next_expiry is None or expires_at < next_expiry:
+                next_expiry = expires_at
+
+    flat = bitmap.decode()
+    seat_map = {
+        "flight": flight.pk,
+        "rows": airplane.rows,
+        "seats_in_row": seats_in_row,
+        "capacity": airplane.capacity,
+        "taken_seats": taken,
+        "held_seats": held_count,
+        "seats_available": airplane.capacity - taken,
+        "seats": [
+            flat[start:start + seats_in_row]
+            for start in range(0, len(flat), seats_in_row)
+        ],
+    }
+    return seat_map, next_expiry
+
+
+def build_seat_map(flight: Flight) -> dict:
+    """
+    Builds the seat map of a flight from a single (row, seat) query.
+
+    "seats" holds one string per row, one character per seat:
+    "1" - sold or held, "0" - free.
+    """
+    return _read_seat_map(flight)[0]
+
+
+def get_seat_map(flight: Flight) -> dict:
+    """
+    Returns the seat map of a flight, cached for AIRPORT_SEAT_MAP_CACHE_TIMEOUT
+    seconds (caching is disabled when the setting is 0 or None), but never
+    past the expiry of the earliest active seat hold.
+    """
+    timeout = getattr(settings, "AIRPORT_SEAT_MAP_CACHE_TIMEOUT", 60)
+    if not timeout:
+        return build_seat_map(flight)
+
+    key = SEAT_MAP_CACHE_KEY.format(flight_id=flight.pk)
+    seat_map = cache.get(key)
+    if seat_map is None:
+        seat_map, next_expiry = _read_seat_map(flight)
+        if next_expiry is not None:
+            until_expiry = (next_expiry - timezone.now()).total_seconds()
+            timeout = max(1, min(timeout, int(until_expiry) + 1))
+        cache.set(key, seat_map, timeout)
+    return seat_map
+
+
+def invalidate_seat_map(flight_id: int) -> None:
+    cache.delete(SEAT_MAP_CACHE_KEY.format(flight_id=flight_id))
+
+
+def annotate_availability(queryset: QuerySet[Flight]) -> QuerySet[Flight]:
+    """
+    Annotates flights with taken_seats (sold + actively held) and
+    seats_available.
+
+    Sold seats come from the Flight.tickets_sold counter column, active holds
+    are counted through the (flight, expires_at) index.
+    """
+    held_seats = (
+        SeatHold.objects.filter(flight=OuterRef("pk"), expires_at__gt=timezone.now())
+        .order_by()
+        .values("flight")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return queryset.annotate(
+        taken_seats=F("tickets_sold")
+        + Coalesce(Subquery(held_seats, output_field=IntegerField()), 0),
+    ).annotate(
+        seats_available=F("airplane__rows") * F("airplane__seats_in_row")
+        - F("taken_seats"),
+    )
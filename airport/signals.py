@@ -0,0 +1,66 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from airport.caching import bump_version
+from airport.connections import connection_index
+from airport.models import Airplane, AirplaneType, Airport, Crew, Flight, Route, Ticket
+from airport.services import invalidate_seat_map
+
+
+# create_order_with_tickets uses bulk_create and updates Flight.tickets_sold
+# itself, these handlers cover tickets saved/deleted one by one (admin,
+# cascades from Order/Flight deletion).
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance: Ticket, created: bool, **kwargs) -> None:
+    if created:
+        Flight.objects.filter(pk=instance.flight_id).update(
+            tickets_sold=F("tickets_sold") + 1, updated_at=timezone.now()
+        )
+    transaction.on_commit(partial(invalidate_seat_map, instance.flight_id))
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance: Ticket, **kwargs) -> None:
+    Flight.objects.filter(pk=instance.flight_id).update(
+        tickets_sold=F("tickets_sold") - 1, updated_at=timezone.now()
+    )
+    transaction.on_commit(partial(invalidate_seat_map, instance.flight_id))
+
+
+@receiver(post_save, sender=Flight)
+def flight_saved(sender, instance: Flight, **kwargs) -> None:
+    transaction.on_commit(partial(connection_index.refresh_flights, [instance.pk]))
+
+
+@receiver(post_delete, sender=Flight)
+def flight_deleted(sender, instance: Flight, **kwargs) -> None:
+    # also bumps the Flight version: deleted rows leave no updated_at behind,
+    # see FlightViewSet.get_validators
+    transaction.on_commit(partial(connection_index.remove_flights, [instance.pk]))
+
+
+@receiver(post_save, sender=Route)
+def route_saved(sender, instance: Route, created: bool, **kwargs) -> None:
+    if created or not connection_index.is_loaded:
+        return
+    flight_ids = list(instance.flights.values_list("pk", flat=True))
+    transaction.on_commit(partial(connection_index.refresh_flights, flight_ids))
+
+
+# Reference data served by CachedResponseMixin viewsets. The version is bumped
+# after commit, so a response cached under the new version is never built
+# from data read before the change became visible.
+
+def reference_data_changed(sender, **kwargs) -> None:
+    transaction.on_commit(partial(bump_version, sender))
+
+
+for model in (Airport, AirplaneType, Airplane, Route, Crew):
+    post_save.connect(reference_data_changed, sender=model, dispatch_uid=f"version-{model.__name__}")
+    post_delete.connect(reference_data_changed, sender=model, dispatch_uid=f"version-{model.__name__}")
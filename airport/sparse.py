@@ -0,0 +1,245 @@
+"""
+Sparse fieldsets and expansion of nested objects: ?fields= and ?expand=.
+
+?fields=id,route,departure_time keeps only the listed fields, dotted paths
+pick fields of nested objects (route.distance, route.source.name).
+
+?expand= lists the nested objects to render as objects, every nested object
+not listed collapses to its primary key (a bare ?expand= collapses all of
+them). So ?expand=route renders the route with the ids of its airports, and
+?expand=route.source,route.destination the airports too. Without it a view
+renders its default_expand: everything nested unless the view says
+otherwise (orders: tickets with the id of their flight). A view may accept
+other names for some paths (expand_aliases). Unknown names are a 400.
+
+The viewsets then only join what is rendered (select_rendered).
+SparseFieldsMixin applies the selection to ModelSerializers, compile_shape
+to the values() fast path of the flight list.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Callable
+
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def _parse(params, name: str) -> frozenset[str] | None:
+    if name not in params:
+        return None
+    values = ",".join(params.getlist(name)).split(",")
+    return frozenset(value.strip() for value in values if value.strip())
+
+
+def _covers(paths: frozenset[str], name: str) -> bool:
+    return any(path == name or path.startswith(f"{name}.") for path in paths)
+
+
+def _below(paths: frozenset[str], name: str) -> frozenset[str]:
+    prefix = f"{name}."
+    return frozenset(path[len(prefix):] for path in paths if path.startswith(prefix))
+
+
+@dataclass(frozen=True)
+class Selection:
+    # None: all fields / every nested object expanded
+    fields: frozenset[str] | None = None
+    expand: frozenset[str] | None = None
+    # dotted path of the nested object, for error messages
+    path: str = ""
+
+    @classmethod
+    def from_request(
+        cls,
+        request,
+        default_expand: frozenset[str] | None = None,
+        expand_aliases: dict[str, str] | None = None,
+    ) -> Selection:
+        params = request.query_params
+        expand = _parse(params, "expand")
+        if expand is not None and expand_aliases:
+            expand = frozenset(expand_aliases.get(path, path) for path in expand)
+        # an empty ?fields= would render nothing, it means all fields
+        return cls(
+            fields=_parse(params, "fields") or None,
+            expand=default_expand if expand is None else expand,
+        )
+
+    @property
+    def is_default(self) -> bool:
+        return self.fields is None and self.expand is None
+
+    def includes(self, name: str) -> bool:
+        return self.fields is None or _covers(self.fields, name)
+
+    def expands(self, name: str) -> bool:
+        return self.expand is None or _covers(self.expand, name)
+
+    def child(self, name: str) -> Selection:
+        """Selection within the nested object name."""
+        whole = self.fields is None or name in self.fields
+        return Selection(
+            fields=None if whole else _below(self.fields, name),
+            expand=None if self.expand is None else _below(self.expand, name),
+            path=f"{self.path}{name}.",
+        )
+
+    def renders(self, path: str) -> bool:
+        """Whether the nested object at the dotted path is rendered as an object."""
+        selection = self
+        for name in path.split("."):
+            if not (selection.includes(name) and selection.expands(name)):
+                return False
+            selection = selection.child(name)
+        return True
+
+    def check(self, fields, nested) -> None:
+        """Rejects names of this level that are not (nested, for expand) fields."""
+        for param, paths, allowed in (
+            ("fields", self.fields, fields),
+            ("expand", self.expand, nested),
+        ):
+            unknown = sorted({path.split(".")[0] for path in paths or ()} - set(allowed))
+            if unknown:
+                names = ", ".join(self.path + name for name in unknown)
+                raise ValidationError({param: f"Unknown field(s): {names}."})
+
+
+def select_rendered(queryset, selection: Selection, paths):
+    """select_related() of the nested objects (dotted paths) that are rendered."""
+    lookups = [path.replace(".", "__") for path in paths if selection.renders(path)]
+    # without arguments select_related() would follow every foreign key
+    return queryset.select_related(*lookups) if lookups else queryset
+
+
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin: leaves the fields not selected out of the output
+    and turns nested serializers not expanded into primary key fields. Input
+    is not affected, the selection only shapes the output.
+
+    The top-level serializer reads the selection from context["selection"]
+    (SparseFieldsViewMixin), nested ones get theirs from the parent.
+    """
+
+    selection: Selection | None = None
+    # names of the readable fields not selected
+    excluded: frozenset[str] = frozenset()
+
+    def get_selection(self) -> Selection | None:
+        if self.selection is not None:
+            return self.selection
+        parent = getattr(self, "parent", None)
+        # top level: no parent, or the ListSerializer of many=True
+        if parent is None or (
+            isinstance(parent, serializers.ListSerializer) and parent.parent is None
+        ):
+            return self.context.get("selection")
+        return None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.get_selection()
+        if selection is None or selection.is_default:
+            return fields
+
+        readable = [name for name, field in fields.items() if not field.write_only]
+        nested = [
+            name
+            for name in readable
+            if fields[name].read_only and isinstance(fields[name], serializers.BaseSerializer)
+        ]
+        selection.check(readable, nested)
+        self.excluded = frozenset(name for name in readable if not selection.includes(name))
+
+        for name in nested:
+            field = fields[name]
+            many = isinstance(field, serializers.ListSerializer)
+            if selection.expands(name):
+                (field.child if many else field).selection = selection.child(name)
+            else:
+                # reads the foreign key column, no query for the related object
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=many, source=field.source
+                )
+        return fields
+
+    @property
+    def _readable_fields(self):
+        # what Serializer.to_representation iterates over
+        for field in super()._readable_fields:
+            if field.field_name not in self.excluded:
+                yield field
+
+
+class SparseFieldsViewMixin:
+    """Viewset mixin: parses ?fields= and ?expand= for the serializer and get_queryset."""
+
+    # nested objects expanded without ?expand=, None: all of them
+    default_expand: frozenset[str] | None = None
+    # other ?expand= names of dotted paths
+    expand_aliases: dict[str, str] = {}
+
+    @cached_property
+    def selection(self) -> Selection:
+        return Selection.from_request(self.request, self.default_expand, self.expand_aliases)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "selection": self.selection}
+
+
+# values() fast paths
+
+
+@dataclass(frozen=True)
+class Nested:
+    """Nested object of a values() shape, pk: the column it collapses to."""
+    pk: str
+    shape: dict
+
+
+@dataclass(frozen=True)
+class Computed:
+    """Value of a values() shape computed from one or more columns."""
+    function: Callable
+    columns: tuple[str, ...]
+
+    def __call__(self, row: dict):
+        return self.function(*[row[column] for column in self.columns])
+
+
+def compile_shape(shape: dict, selection: Selection) -> tuple[list[str], Callable[[dict], dict]]:
+    """
+    The values() columns a selection of shape needs, and a function building
+    the representation of one row. shape maps the keys of the representation
+    to a column, a Computed or a Nested shape.
+    """
+    nested = [name for name, value in shape.items() if isinstance(value, Nested)]
+    selection.check(shape, nested)
+
+    columns, getters = [], []
+    for name, value in shape.items():
+        if not selection.includes(name):
+            continue
+        if isinstance(value, Nested):
+            if selection.expands(name):
+                nested_columns, getter = compile_shape(value.shape, selection.child(name))
+                columns.extend(nested_columns)
+            else:
+                columns.append(value.pk)
+                getter = itemgetter(value.pk)
+        elif isinstance(value, Computed):
+            columns.extend(value.columns)
+            getter = value
+        else:
+            columns.append(value)
+            getter = itemgetter(value)
+        getters.append((name, getter))
+
+    def build(row: dict) -> dict:
+        return {name: getter(row) for name, getter in getters}
+
+    return list(dict.fromkeys(columns)), build
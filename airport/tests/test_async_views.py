@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from airport.models import Airplane, AirplaneType, Airport, Flight, Route
+
+
+@override_settings(AIRPORT_LONG_POLL_INTERVAL=0.01)
+class FlightSeatsWaitTests(TestCase):
+    """?wait= of the seat map long poll."""
+
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        departure = timezone.now() + timedelta(days=1)
+        flight = Flight.objects.create(
+            route=Route.objects.create(source=kyiv, destination=lviv, distance=470),
+            airplane=Airplane.objects.create(
+                name="UR-001",
+                rows=10,
+                seats_in_row=4,
+                airplane_type=AirplaneType.objects.create(name="ATR 72"),
+            ),
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=1),
+        )
+        cls.url = reverse("async-flight-seats", args=[flight.pk])
+
+    def test_non_finite_wait_is_rejected(self):
+        for wait in ("nan", "inf", "-inf", "NaN"):
+            with self.subTest(wait=wait):
+                response = self.client.get(self.url, {"wait": wait})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("wait", response.json())
+
+    def test_wait_times_out_with_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, {"wait": "0.05"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class FlightSearchTests(TestCase):
+    """The async search applies the filters, search and ordering of the flight list."""
+
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        airplane = Airplane.objects.create(
+            name="UR-001",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="ATR 72"),
+        )
+        start = timezone.now() + timedelta(days=1)
+        for day, (source, destination) in enumerate(((kyiv, lviv), (lviv, kyiv)) * 2):
+            departure = start + timedelta(days=day)
+            Flight.objects.create(
+                route=Route.objects.get_or_create(
+                    source=source, destination=destination, distance=470
+                )[0],
+                airplane=airplane,
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=1),
+            )
+
+    def test_matches_the_flight_list(self):
+        for params in (
+            {},
+            {"search": "Boryspil"},
+            {"search": "lviv boryspil"},
+            {"search": "nowhere"},
+            {"ordering": "departure_time"},
+            {"ordering": "-arrival_time", "search": "Lviv"},
+            {"ordering": "unknown"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(reverse("async-flight-search"), params)
+                self.assertEqual(response.status_code, 200)
+                expected = self.client.get(reverse("flight-list"), params).data["results"]
+                self.assertEqual(
+                    [flight["id"] for flight in response.json()["results"]],
+                    [flight["id"] for flight in expected],
+                )
+                self.assertEqual(response.json()["count"], len(expected))
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from airport import services
+from airport.models import Airplane, AirplaneType, Airport, Flight, Route, Ticket
+
+
+class BookingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        departure = timezone.now() + timedelta(days=1)
+        cls.flight = Flight.objects.create(
+            route=Route.objects.create(source=kyiv, destination=lviv, distance=470),
+            airplane=Airplane.objects.create(
+                name="UR-001",
+                rows=10,
+                seats_in_row=4,
+                airplane_type=AirplaneType.objects.create(name="ATR 72"),
+            ),
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=1),
+        )
+        cls.user = get_user_model().objects.create_user("passenger", password="pw12345!x")
+
+
+class BookingRetryTests(BookingTestCase):
+    """Only transient database errors are retried and reported as a busy flight."""
+
+    def book(self, error: Exception):
+        with mock.patch.object(services, "_create_order_with_tickets", side_effect=error):
+            services.create_order_with_tickets(
+                user=self.user, flight=self.flight, seats=[{"row": 1, "seat": 1}], retries=0
+            )
+
+    def test_database_locked_is_a_busy_flight(self):
+        with self.assertRaises(services.FlightBusyError):
+            self.book(OperationalError("database is locked"))
+
+    def test_deadlock_is_a_busy_flight(self):
+        cause = Exception("deadlock detected")
+        cause.sqlstate = "40P01"
+        error = OperationalError("deadlock detected")
+        error.__cause__ = cause
+        with self.assertRaises(services.FlightBusyError):
+            self.book(error)
+
+    def test_other_errors_are_not_masked(self):
+        cause = Exception("server closed the connection unexpectedly")
+        cause.sqlstate = "08006"
+        error = OperationalError("server closed the connection unexpectedly")
+        error.__cause__ = cause
+        with self.assertRaises(OperationalError) as raised:
+            self.book(error)
+        self.assertNotIsInstance(raised.exception, services.FlightBusyError)
+
+    def test_other_sqlite_errors_are_not_masked(self):
+        with self.assertRaises(OperationalError) as raised:
+            self.book(OperationalError("no such table: airport_ticket"))
+        self.assertNotIsInstance(raised.exception, services.FlightBusyError)
+
+
+@override_settings(AIRPORT_BOOKING_LOCK="none")
+class HoldBookingRaceTests(BookingTestCase):
+    """A hold and a booking of the same seat cannot both succeed without a booking lock."""
+
+    seats = [{"row": 1, "seat": 1}]
+
+    def test_hold_locks_the_flight_before_the_seat_check(self):
+        with CaptureQueriesContext(connection) as queries:
+            services.hold_seats(user=self.user, flight=self.flight, seats=self.seats)
+        statements = [
+            query["sql"]
+            for query in queries
+            if not query["sql"].startswith(("SAVEPOINT", "RELEASE"))
+        ]
+        self.assertTrue(statements[0].startswith('UPDATE "airport_flight"'), statements[0])
+
+    def test_booking_rechecks_holds_committed_after_validation(self):
+        other = get_user_model().objects.create_user("other", password="pw12345!x")
+        services.hold_seats(user=other, flight=self.flight, seats=self.seats)
+
+        # as if the hold had been committed after the booking validated the seats
+        with mock.patch.object(
+            services, "validate_requested_seats", return_value={(1, 1)}
+        ), self.assertRaises(services.SeatConflictError):
+            services.create_order_with_tickets(user=self.user, flight=self.flight, seats=self.seats)
+        self.assertFalse(Ticket.objects.filter(flight=self.flight).exists())
+
+    def test_hold_rejects_sold_seats(self):
+        services.create_order_with_tickets(user=self.user, flight=self.flight, seats=self.seats)
+        with self.assertRaises(services.SeatConflictError):
+            services.hold_seats(user=self.user, flight=self.flight, seats=self.seats)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.caching import get_versions
+from airport.models import Airplane, AirplaneType, Airport, Crew, Flight, Route
+
+
+class FlightBulkTests(TestCase):
+    """POST/PATCH /api/flights/bulk/."""
+
+    url = "/api/flights/bulk/"
+
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        cls.route = Route.objects.create(source=kyiv, destination=lviv, distance=470)
+        cls.airplane = Airplane.objects.create(
+            name="UR-001",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="ATR 72"),
+        )
+        cls.pilot = Crew.objects.create(first_name="Olena", last_name="Koval")
+        cls.start = timezone.now() + timedelta(days=1)
+        cls.staff = get_user_model().objects.create_user(
+            "staff", password="pw12345!x", is_staff=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.day = 0
+
+    def payload(self, count: int, **extra) -> list[dict]:
+        items = []
+        for _ in range(count):
+            # a different day each, the airplane is never double-booked
+            self.day += 1
+            departure = self.start + timedelta(days=self.day)
+            items.append(
+                {
+                    "route_id": self.route.pk,
+                    "airplane_id": self.airplane.pk,
+                    "departure_time": departure.isoformat(),
+                    "arrival_time": (departure + timedelta(hours=1)).isoformat(),
+                    **extra,
+                }
+            )
+        return items
+
+    def post(self, payload: list[dict]) -> tuple[int, list]:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return len(queries), response.data
+
+    def test_create_queries_do_not_grow_with_the_items(self):
+        for extra in ({}, {"crew_ids": [self.pilot.pk]}):
+            with self.subTest(extra=extra):
+                few, _ = self.post(self.payload(2, **extra))
+                many, data = self.post(self.payload(10, **extra))
+                self.assertEqual(few, many)
+                expected = [self.pilot.pk] if extra else []
+                self.assertEqual(
+                    [[member["id"] for member in item["crew"]] for item in data],
+                    [expected] * 10,
+                )
+
+    def test_update_queries_do_not_grow_with_the_items(self):
+        counts = []
+        for count in (2, 10):
+            _, data = self.post(self.payload(count, crew_ids=[self.pilot.pk]))
+            # the stored crew is checked for double bookings, even when it is not rendered
+            payload = [{"id": item["id"], "arrival_time": item["arrival_time"]} for item in data]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(f"{self.url}?fields=id", payload, format="json")
+            self.assertEqual(response.status_code, 200, response.data)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_writes_bump_the_flight_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            before = get_versions([Flight])
+            _, data = self.post(self.payload(2))
+        created = get_versions([Flight])
+        self.assertGreater(created, before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                self.url,
+                [{"id": item["id"], "crew_ids": [self.pilot.pk]} for item in data],
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertGreater(get_versions([Flight]), created)
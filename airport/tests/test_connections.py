@@ -0,0 +1,71 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from airport.caching import bump_version
+from airport.connections import ConnectionIndex, connection_index
+from airport.models import Airplane, AirplaneType, Airport, Flight, Route
+
+
+class ConnectionIndexVersionTests(TestCase):
+    """Indexes of other processes are reloaded once a change is published."""
+
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        cls.route = Route.objects.create(source=kyiv, destination=lviv, distance=470)
+        cls.airplane = Airplane.objects.create(
+            name="UR-001",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="ATR 72"),
+        )
+        cls.departure = timezone.now() + timedelta(days=1)
+
+    def new_flight(self, **kwargs) -> Flight:
+        return Flight(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.departure,
+            arrival_time=self.departure + timedelta(hours=1),
+            **kwargs,
+        )
+
+    def departures(self, index: ConnectionIndex) -> list[int]:
+        index.ensure_fresh()
+        hour = timedelta(hours=1)
+        legs = index.departures(self.route.source_id, self.departure - hour, self.departure + hour)
+        return [leg.flight_id for leg in legs]
+
+    def test_other_process_reloads_after_a_signal_refresh(self):
+        other = ConnectionIndex()
+        self.assertEqual(self.departures(other), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flight = self.new_flight()
+            flight.save()
+
+        self.assertEqual(self.departures(other), [flight.pk])
+
+    def test_writing_process_keeps_its_patched_index(self):
+        connection_index.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            flight = self.new_flight()
+            flight.save()
+
+        with mock.patch.object(connection_index, "load", wraps=connection_index.load) as load:
+            self.assertEqual(self.departures(connection_index), [flight.pk])
+        load.assert_not_called()
+
+    def test_bulk_writes_are_picked_up_after_a_version_bump(self):
+        other = ConnectionIndex()
+        self.departures(other)
+        # bulk_create sends no signals
+        flight = Flight.objects.bulk_create([self.new_flight()])[0]
+        self.assertEqual(self.departures(other), [])
+
+        bump_version(Flight)
+        self.assertEqual(self.departures(other), [flight.pk])
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+class ExportNegotiationTests(TestCase):
+    """Export format from ?format= and Accept, NDJSON when Accept matches neither."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user(
+            username="staff", password="pw12345!x", is_staff=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_accept_picks_the_format(self):
+        for accept, media_type in (
+            ("text/csv", "text/csv"),
+            ("application/x-ndjson", "application/x-ndjson"),
+            ("application/json", "application/x-ndjson"),
+            ("text/html, application/xml;q=0.9", "application/x-ndjson"),
+        ):
+            for url in (reverse("flight-export"), reverse("orders-export")):
+                with self.subTest(accept=accept, url=url):
+                    response = self.client.get(url, HTTP_ACCEPT=accept)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(response["Content-Type"].startswith(media_type))
+
+    def test_unknown_format_is_not_found(self):
+        response = self.client.get(reverse("flight-export"), {"format": "json"})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,78 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from airport.models import Airplane, Airport, Flight, Route
+
+
+class ImportScheduleTests(TestCase):
+    """Bad rows are reported with their line and skipped, the rest is imported."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: str) -> Path:
+        path = Path(self.directory.name) / name
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def run_import(self, **files) -> str:
+        paths = {name: self.write(*file) for name, file in files.items()}
+        stderr = StringIO()
+        call_command(
+            "import_schedule",
+            **paths,
+            stdout=StringIO(),
+            stderr=stderr,
+        )
+        return stderr.getvalue()
+
+    def import_reference_data(self) -> None:
+        self.run_import(
+            airports=("airports.csv", "name,closest_big_city\nKBP,Kyiv\nLWO,Lviv\n"),
+            airplanes=("airplanes.csv", "name,rows,seats_in_row,airplane_type\nUR-1,10,4,ATR\n"),
+            routes=("routes.csv", "source,destination,distance\nKBP,LWO,470\n"),
+        )
+
+    def test_malformed_rows_are_skipped(self):
+        errors = self.run_import(
+            airports=("airports.csv", "name,closest_big_city\nKBP,Kyiv\nLWO\n"),
+            airplanes=(
+                "airplanes.ndjson",
+                '{"name": "UR-1", "rows": "ten", "seats_in_row": 4, "airplane_type": "ATR"}\n'
+                "{not json\n"
+                '{"name": "UR-2", "rows": 10, "seats_in_row": 4, "airplane_type": "ATR"}\n',
+            ),
+        )
+        self.assertEqual(list(Airport.objects.values_list("name", flat=True)), ["KBP"])
+        self.assertEqual(list(Airplane.objects.values_list("name", flat=True)), ["UR-2"])
+        self.assertIn("airports.csv:3", errors)
+        self.assertIn("missing closest_big_city", errors)
+        self.assertIn("airplanes.ndjson:1", errors)
+        self.assertIn("rows is not an integer", errors)
+        self.assertIn("airplanes.ndjson:2", errors)
+
+    def test_route_to_the_same_airport_is_skipped(self):
+        self.import_reference_data()
+        errors = self.run_import(
+            routes=("routes.csv", "source,destination,distance\nKBP,KBP,1\nLWO,KBP,470\n")
+        )
+        self.assertIn("same airport", errors)
+        self.assertEqual(Route.objects.count(), 2)
+
+    def test_flights_are_not_imported_twice(self):
+        self.import_reference_data()
+        flights = (
+            "flights.csv",
+            "source,destination,airplane,departure_time,arrival_time\n"
+            "KBP,LWO,UR-1,2030-01-01T08:00:00+00:00,2030-01-01T09:00:00+00:00\n"
+            "KBP,LWO,UR-1,2030-01-01T10:00:00+02:00,2030-01-01T11:00:00+02:00\n"
+            "KBP,LWO,UR-1,2030-01-02T08:00:00+00:00,2030-01-02T09:00:00+00:00\n",
+        )
+        self.run_import(flights=flights)
+        self.run_import(flights=flights)
+        self.assertEqual(Flight.objects.count(), 2)
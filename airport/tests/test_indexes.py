@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from airport.models import Airplane, AirplaneType, Airport, Flight, Order, Route
+
+
+class QueryPlanTests(TestCase):
+    """The search and order list queries are served by the 0003 indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        cls.route = Route.objects.create(source=kyiv, destination=lviv, distance=470)
+        airplane = Airplane.objects.create(
+            name="UR-001",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="ATR 72"),
+        )
+        cls.start = timezone.now()
+        Flight.objects.bulk_create(
+            Flight(
+                route=cls.route,
+                airplane=airplane,
+                departure_time=cls.start + timedelta(hours=i * 6),
+                arrival_time=cls.start + timedelta(hours=i * 6 + 1),
+            )
+            for i in range(20)
+        )
+        cls.user = get_user_model().objects.create_user("passenger", password="pw12345!x")
+        Order.objects.bulk_create(Order(user=cls.user) for _ in range(20))
+
+    def explain(self, queryset) -> str:
+        if connection.vendor == "postgresql":
+            # tiny test tables are cheaper to scan, the plan of interest is
+            # the one chosen once the tables are big
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_departure_range_uses_departure_index(self):
+        plan = self.explain(
+            Flight.objects.filter(
+                departure_time__gte=self.start, departure_time__lt=self.start + timedelta(days=1)
+            )
+        )
+        self.assertIn("flight_departure_idx", plan)
+
+    def test_route_departure_range_uses_composite_index(self):
+        plan = self.explain(
+            Flight.objects.filter(
+                route=self.route,
+                departure_time__gte=self.start,
+                departure_time__lt=self.start + timedelta(days=1),
+            )
+        )
+        self.assertIn("flight_route_departure_idx", plan)
+
+    def test_order_list_uses_user_created_index(self):
+        plan = self.explain(Order.objects.filter(user=self.user).order_by("-created_at", "-id"))
+        self.assertIn("order_user_created_idx", plan)
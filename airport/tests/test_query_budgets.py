@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, AirplaneType, Airport, Flight, Route
+
+
+@override_settings(AIRPORT_QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TransactionTestCase):
+    """
+    Hot endpoints stay within AIRPORT_QUERY_BUDGETS, authentication included.
+    Not a TestCase: its outer transaction turns the transactions of the views
+    into savepoints, which would count as queries.
+    """
+
+    def setUp(self):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        route = Route.objects.create(source=kyiv, destination=lviv, distance=470)
+        airplane = Airplane.objects.create(
+            name="UR-001",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="ATR 72"),
+        )
+        start = timezone.now() + timedelta(days=1)
+        self.flights = Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=start + timedelta(hours=i * 6),
+                arrival_time=start + timedelta(hours=i * 6 + 1),
+            )
+            for i in range(10)
+        )
+        get_user_model().objects.create_user("passenger", password="pw12345!x")
+
+        # a real token: the budgets count the authentication queries
+        self.client = APIClient()
+        response = self.client.post(
+            reverse("token_obtain_pair"), {"username": "passenger", "password": "pw12345!x"}
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_book_seats(self):
+        response = self.client.post(
+            reverse("orders-list"),
+            {"flight_id": self.flights[0].pk, "seats": [{"row": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_hold_seats(self):
+        response = self.client.post(
+            reverse("holds-list"),
+            {"flight_id": self.flights[0].pk, "seats": [{"row": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_flight_list(self):
+        response = self.client.get(reverse("flight-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_seat_map(self):
+        response = self.client.get(reverse("flight-seats", args=[self.flights[0].pk]))
+        self.assertEqual(response.status_code, 200)
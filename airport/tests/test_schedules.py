@@ -0,0 +1,184 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.schedules import materialize_schedule
+
+
+class ScheduleTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        cls.route = Route.objects.create(source=kyiv, destination=lviv, distance=470)
+        cls.airplane = Airplane.objects.create(
+            name="UR-001",
+            rows=10,
+            seats_in_row=4,
+            airplane_type=AirplaneType.objects.create(name="ATR 72"),
+        )
+        cls.pilot = Crew.objects.create(first_name="Olena", last_name="Koval")
+        cls.first_day = date.today() + timedelta(days=7)
+
+    def setUp(self):
+        self.schedule = FlightSchedule.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            weekdays=127,
+            departure_time=time(8, 0),
+            duration=timedelta(hours=1),
+            time_zone="UTC",
+            valid_from=self.first_day,
+            valid_until=self.first_day + timedelta(days=4),
+        )
+        self.schedule.crew.set([self.pilot])
+
+    def departure(self, day: date, at: time = time(8, 0)) -> datetime:
+        return datetime.combine(day, at, tzinfo=dt_timezone.utc)
+
+    def departures(self) -> list[datetime]:
+        return list(
+            self.schedule.flights.order_by("departure_time").values_list(
+                "departure_time", flat=True
+            )
+        )
+
+
+class MaterializeConflictTests(ScheduleTestCase):
+    """Generated flights do not double-book the airplane or the crew."""
+
+    def test_occurrence_on_a_busy_airplane_is_skipped(self):
+        busy_day = self.first_day + timedelta(days=2)
+        Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.departure(busy_day, time(7, 30)),
+            arrival_time=self.departure(busy_day, time(9, 0)),
+        )
+
+        with self.assertLogs("airport.schedules", "WARNING") as logs:
+            flights = materialize_schedule(self.schedule, until=self.schedule.valid_until)
+
+        self.assertEqual(len(flights), 4)
+        self.assertNotIn(self.departure(busy_day), self.departures())
+        self.assertIn("Airplane is already on", logs.output[0])
+
+    def test_occurrence_with_a_busy_crew_member_is_skipped(self):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=Airplane.objects.create(
+                name="UR-002", rows=10, seats_in_row=4, airplane_type=self.airplane.airplane_type
+            ),
+            departure_time=self.departure(self.first_day, time(8, 30)),
+            arrival_time=self.departure(self.first_day, time(10, 0)),
+        )
+        flight.crew.set([self.pilot])
+
+        with self.assertLogs("airport.schedules", "WARNING"):
+            materialize_schedule(self.schedule, until=self.schedule.valid_until)
+
+        self.assertNotIn(self.departure(self.first_day), self.departures())
+
+    def test_skipped_occurrence_is_retried(self):
+        busy_day = self.first_day + timedelta(days=2)
+        busy = Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.departure(busy_day, time(7, 30)),
+            arrival_time=self.departure(busy_day, time(9, 0)),
+        )
+        with self.assertLogs("airport.schedules", "WARNING"):
+            materialize_schedule(self.schedule, until=self.schedule.valid_until)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.materialized_until, busy_day - timedelta(days=1))
+
+        busy.delete()
+        flights = materialize_schedule(self.schedule, until=self.schedule.valid_until)
+
+        self.assertEqual(len(flights), 1)
+        self.assertEqual(
+            self.departures(),
+            [self.departure(self.first_day + timedelta(days=i)) for i in range(5)],
+        )
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.materialized_until, self.schedule.valid_until)
+
+
+class RescheduleTests(ScheduleTestCase):
+    """Editing the pattern of a schedule regenerates its future flights."""
+
+    def setUp(self):
+        super().setUp()
+        materialize_schedule(self.schedule, until=self.schedule.valid_until)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("staff", password="pw12345!x", is_staff=True)
+        )
+        self.url = f"/api/flight-schedules/{self.schedule.pk}/"
+
+    def test_new_departure_time_regenerates_the_flights(self):
+        response = self.client.patch(self.url, {"departure_time": "09:30"}, format="json")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["materialized_until"], self.schedule.valid_until.isoformat())
+        self.assertEqual(
+            self.departures(),
+            [self.departure(self.first_day + timedelta(days=i), time(9, 30)) for i in range(5)],
+        )
+
+    def test_flights_with_tickets_are_kept(self):
+        sold = self.schedule.flights.order_by("departure_time").first()
+        passenger = get_user_model().objects.create_user("passenger", password="pw12345!x")
+        Ticket.objects.create(
+            flight=sold, order=Order.objects.create(user=passenger), row=1, seat=1
+        )
+
+        self.client.patch(self.url, {"weekdays": 1}, format="json")
+
+        mondays = [
+            self.departure(self.first_day + timedelta(days=i))
+            for i in range(5)
+            if (self.first_day + timedelta(days=i)).weekday() == 0
+        ]
+        self.assertEqual(self.departures(), sorted({sold.departure_time, *mondays}))
+
+    def test_flights_after_a_skipped_occurrence_are_regenerated(self):
+        self.schedule.flights.all().delete()
+        FlightSchedule.objects.filter(pk=self.schedule.pk).update(materialized_until=None)
+        busy_day = self.first_day + timedelta(days=2)
+        Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.departure(busy_day, time(7, 30)),
+            arrival_time=self.departure(busy_day, time(9, 0)),
+        )
+        with self.assertLogs("airport.schedules", "WARNING"):
+            materialize_schedule(self.schedule, until=self.schedule.valid_until)
+
+        self.client.patch(self.url, {"departure_time": "09:30"}, format="json")
+
+        self.assertEqual(
+            self.departures(),
+            [self.departure(self.first_day + timedelta(days=i), time(9, 30)) for i in range(5)],
+        )
+
+    def test_unchanged_pattern_keeps_the_flights(self):
+        flight_ids = set(self.schedule.flights.values_list("pk", flat=True))
+
+        response = self.client.patch(self.url, {"departure_time": "08:00"}, format="json")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(set(self.schedule.flights.values_list("pk", flat=True)), flight_ids)
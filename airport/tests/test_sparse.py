@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.models import Airplane, AirplaneType, Airport, Flight, Order, Route, Ticket
+from airport.serializers import FLIGHT_LIST_SHAPE
+from airport.sparse import Selection, compile_shape
+
+
+class CompileShapeTests(TestCase):
+    """The values() columns of a selection of the flight list."""
+
+    def columns(self, **selection) -> list[str]:
+        columns, _ = compile_shape(FLIGHT_LIST_SHAPE, Selection(**selection))
+        return columns
+
+    def test_fields_prune_the_columns(self):
+        self.assertEqual(
+            self.columns(fields=frozenset({"id", "route.distance", "route.source.name"})),
+            ["id", "route__source__name", "route__distance"],
+        )
+
+    def test_collapsed_objects_read_their_foreign_key(self):
+        self.assertEqual(
+            self.columns(fields=frozenset({"route", "airplane"}), expand=frozenset()),
+            ["route_id", "airplane_id"],
+        )
+
+    def test_computed_values_read_their_columns(self):
+        self.assertEqual(
+            self.columns(fields=frozenset({"airplane.capacity"})),
+            ["airplane__rows", "airplane__seats_in_row"],
+        )
+
+    def test_build_matches_the_selection(self):
+        _, build = compile_shape(
+            FLIGHT_LIST_SHAPE, Selection(fields=frozenset({"id", "route"}), expand=frozenset())
+        )
+        self.assertEqual(build({"id": 1, "route_id": 2}), {"id": 1, "route": 2})
+
+
+class SparseFieldsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        kyiv = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+        lviv = Airport.objects.create(name="Lviv International", closest_big_city="Lviv")
+        departure = timezone.now() + timedelta(days=1)
+        cls.flight = Flight.objects.create(
+            route=Route.objects.create(source=kyiv, destination=lviv, distance=470),
+            airplane=Airplane.objects.create(
+                name="UR-001",
+                rows=10,
+                seats_in_row=4,
+                airplane_type=AirplaneType.objects.create(name="ATR 72"),
+            ),
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=1),
+        )
+        cls.user = get_user_model().objects.create_user("passenger", password="pw12345!x")
+        cls.order = Order.objects.create(user=cls.user)
+        Ticket.objects.create(flight=cls.flight, order=cls.order, row=1, seat=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class UnknownFieldTests(SparseFieldsTestCase):
+    """Unknown ?fields= and ?expand= names are a 400 naming them."""
+
+    def test_unknown_names(self):
+        for url, param, name in (
+            ("/api/flights/?fields=id,nope", "fields", "nope"),
+            ("/api/flights/?fields=route.nope", "fields", "route.nope"),
+            ("/api/flights/?expand=nope", "expand", "nope"),
+            # not a nested object
+            ("/api/flights/?expand=departure_time", "expand", "departure_time"),
+            ("/api/flights/?expand=route.nope", "expand", "route.nope"),
+            (f"/api/flights/{self.flight.pk}/?fields=nope", "fields", "nope"),
+            ("/api/routes/?expand=source.nope", "expand", "source.nope"),
+            ("/api/orders/?expand=route", "expand", "route"),
+            ("/api/orders/?fields=tickets.nope", "fields", "tickets.nope"),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {param: f"Unknown field(s): {name}."})
+
+
+class FlightListColumnTests(SparseFieldsTestCase):
+    """The flight list reads only the selected columns and joins only their tables."""
+
+    def list_sql(self, query: str) -> str:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/flights/{query}")
+        self.assertEqual(response.status_code, 200)
+        # the page query, read after the ETag validators
+        return [query["sql"] for query in queries if "LIMIT" in query["sql"]][-1]
+
+    def test_unselected_columns_are_not_read(self):
+        sql = self.list_sql("?fields=id,departure_time")
+        select = sql[: sql.index(" FROM ")]
+        self.assertEqual(
+            select,
+            'SELECT "airport_flight"."id", "airport_flight"."departure_time"',
+        )
+        self.assertNotIn('"airport_airport"', sql)
+
+    def test_selected_nested_columns_are_read(self):
+        sql = self.list_sql("?fields=id,route.source.name")
+        self.assertIn('"airport_airport"."name"', sql)
+        self.assertNotIn('"airport_airplane"."name"', sql)
+        self.assertNotIn('"airport_airport"."closest_big_city"', sql)
+
+    def test_ordering_column_is_read_for_the_cursor(self):
+        sql = self.list_sql("?fields=id&ordering=arrival_time")
+        self.assertIn('"airport_flight"."arrival_time"', sql[: sql.index(" FROM ")])
+
+
+class OrderExpandTests(SparseFieldsTestCase):
+    """?expand= means the same on orders: listed objects are rendered, the others are ids."""
+
+    def ticket(self, query: str = ""):
+        response = self.client.get(f"/api/orders/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"][0]["tickets"][0]
+
+    def test_default_renders_the_flight_id(self):
+        self.assertEqual(self.ticket()["flight"], self.flight.pk)
+
+    def test_expand_renders_the_flight(self):
+        for query in ("?expand=tickets.flight", "?expand=flight"):
+            with self.subTest(query=query):
+                flight = self.ticket(query)["flight"]
+                self.assertEqual(flight["id"], self.flight.pk)
+                self.assertEqual(flight["source"], "Boryspil")
+
+    def test_bare_expand_collapses_the_tickets(self):
+        self.assertEqual(self.ticket("?expand="), Ticket.objects.get().pk)
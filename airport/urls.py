@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from airport.async_views import flight_search, flight_seats
 from airport.views import (
     AirportViewSet,
     RouteViewSet,
@@ -8,7 +9,10 @@ from airport.views import (
     AirplaneViewSet,
     CrewViewSet,
     FlightViewSet,
+    FlightScheduleViewSet,
     OrderViewSet,
+    SeatHoldViewSet,
+    ResponseCacheStatsView,
 )
 
 router = DefaultRouter()
@@ -18,8 +22,13 @@ router.register("airplane-types", AirplaneTypeViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("crew", CrewViewSet)
 router.register("flights", FlightViewSet)
+router.register("flight-schedules", FlightScheduleViewSet)
 router.register("orders", OrderViewSet, basename="orders")
+router.register("holds", SeatHoldViewSet, basename="holds")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("cache-stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
+    path("async/flights/", flight_search, name="async-flight-search"),
+    path("async/flights/<int:pk>/seats/", flight_seats, name="async-flight-seats"),
 ]
@@ -1,10 +1,52 @@
+from datetime import datetime, time, timedelta
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from rest_framework import generics, mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from airport.models import Airport, Route, AirplaneType, Airplane, Crew, Flight, Order
-from airport.permissions import IsAdminOrReadOnly
+from airport.bulk import BulkModelMixin
+from airport.caching import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    bump_version,
+    get_stats,
+    get_versions,
+    version_to_datetime,
+)
+from airport.connections import connection_index, search_connections
+from airport.exports import export_response
+from airport.filters import FlightFilter
+from airport.metrics import FLIGHT_REQUEST_DURATION, registry
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Order,
+    Ticket,
+)
+from airport.pagination import FlightPagination, OrderPagination
+from airport.permissions import HasMetricsToken, IsAdminOrReadOnly
+from airport.renderers import (
+    CSVRenderer,
+    ExportContentNegotiation,
+    NDJSONRenderer,
+    PrometheusRenderer,
+)
 from airport.serializers import (
     AirportSerializer,
     RouteSerializer,
@@ -13,12 +55,68 @@ from airport.serializers import (
     CrewSerializer,
     FlightListSerializer,
     FlightDetailSerializer,
+    FLIGHT_LIST_SHAPE,
+    flight_list_data,
+    FlightScheduleSerializer,
+    MaterializeScheduleSerializer,
+    SeatMapSerializer,
+    ConnectionSearchSerializer,
+    ORDER_DEFAULT_EXPAND,
     OrderSerializer,
     OrderCreateSerializer,
+    SeatHoldCreateSerializer,
+    ResponseCacheStatsSerializer,
+    seat_hold_data,
+)
+from airport.schedules import materialize_schedule, reschedule, schedule_pattern
+from airport.services import (
+    SeatBookingError,
+    SeatHoldError,
+    annotate_availability,
+    confirm_seat_hold,
+    get_seat_hold,
+    get_seat_map,
+    release_seat_hold,
+)
+from airport.sparse import SparseFieldsViewMixin, compile_shape, select_rendered
+
+SPARSE_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        str,
+        description="Comma-separated fields to render, dotted for nested ones "
+        "(id,departure_time,route.source.name). All fields by default.",
+    ),
+    OpenApiParameter(
+        "expand",
+        str,
+        description="Comma-separated nested objects to render as objects (route,route.source); "
+        "the others collapse to their id. Everything is nested by default.",
+    ),
+]
+ORDER_SPARSE_PARAMETERS = [
+    SPARSE_PARAMETERS[0],
+    OpenApiParameter(
+        "expand",
+        str,
+        description="Comma-separated nested objects to render as objects; the others collapse "
+        'to their id. Default "tickets": tickets with the id of their flight; '
+        '"tickets.flight" (or "flight") renders a summary of the flight (route, times) '
+        "instead.",
+    ),
+]
+# joined only when rendered, see airport.sparse
+FLIGHT_RELATED_OBJECTS = (
+    "route",
+    "route.source",
+    "route.destination",
+    "airplane",
+    "airplane.airplane_type",
 )
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_models = (Airport,)
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -28,7 +126,18 @@ class AirportViewSet(viewsets.ModelViewSet):
     ordering_fields = ("name",)
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS),
+)
+class RouteViewSet(
+    SparseFieldsViewMixin,
+    BulkModelMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    viewsets.ModelViewSet,
+):
+    cache_models = (Route, Airport)
     queryset = Route.objects.select_related("source", "destination")
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -38,8 +147,20 @@ class RouteViewSet(viewsets.ModelViewSet):
     search_fields = ("source__name", "destination__name")
     ordering_fields = ("distance", "source__name", "destination__name")
 
+    def get_queryset(self):
+        return select_rendered(Route.objects.all(), self.selection, ("source", "destination"))
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+    def bulk_saved(self, objs, *, created):
+        transaction.on_commit(partial(bump_version, Route))
+        if not created and connection_index.is_loaded:
+            flight_ids = list(
+                Flight.objects.filter(route__in=objs).values_list("pk", flat=True)
+            )
+            transaction.on_commit(partial(connection_index.refresh_flights, flight_ids))
+
+
+class AirplaneTypeViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_models = (AirplaneType,)
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -49,7 +170,14 @@ class AirplaneTypeViewSet(viewsets.ModelViewSet):
     ordering_fields = ("name",)
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS),
+)
+class AirplaneViewSet(
+    SparseFieldsViewMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
+    cache_models = (Airplane, AirplaneType)
     queryset = Airplane.objects.select_related("airplane_type")
     serializer_class = AirplaneSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -59,8 +187,12 @@ class AirplaneViewSet(viewsets.ModelViewSet):
     search_fields = ("name", "airplane_type__name")
     ordering_fields = ("name", "rows", "seats_in_row")
 
+    def get_queryset(self):
+        return select_rendered(Airplane.objects.all(), self.selection, ("airplane_type",))
+
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    cache_models = (Crew,)
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -70,7 +202,19 @@ class CrewViewSet(viewsets.ModelViewSet):
     ordering_fields = ("last_name", "first_name")
 
 
-class FlightViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=SPARSE_PARAMETERS),
+    retrieve=extend_schema(parameters=SPARSE_PARAMETERS),
+)
+class FlightViewSet(
+    SparseFieldsViewMixin, BulkModelMixin, ConditionalGetMixin, viewsets.ModelViewSet
+):
+    # The Flight version is bumped after every flight save, deletion and bulk
+    # write (connection_index publishes it); it is what catches deletions,
+    # which leave no updated_at behind. Bookings and holds only update the
+    # rows (queryset updates, no signal): the updated_at and taken_seats of
+    # each row in get_validators catch those.
+    cache_models = (Flight, Route, Airport, Airplane, AirplaneType, Crew)
     queryset = (
         Flight.objects.select_related(
             "route__source",
@@ -80,34 +224,377 @@ class FlightViewSet(viewsets.ModelViewSet):
         .prefetch_related("crew")
     )
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = FlightPagination
 
     filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter)
-    filterset_fields = (
-        "route__source",
-        "route__destination",
-        "airplane",
-        "airplane__airplane_type",
-    )
+    filterset_class = FlightFilter
     search_fields = (
         "route__source__name",
         "route__destination__name",
         "airplane__name",
     )
-    ordering_fields = ("departure_time", "arrival_time")
+    ordering_fields = ("departure_time", "arrival_time", "taken_seats", "seats_available")
+
+    def get_queryset(self):
+        if self.action in ("seats", "manifest"):
+            return Flight.objects.select_related("airplane")
+
+        # only the related objects that are rendered (?fields=, ?expand=)
+        queryset = select_rendered(Flight.objects.all(), self.selection, FLIGHT_RELATED_OBJECTS)
+        # the list serializer does not render the crew
+        if self.action != "list" and self.selection.includes("crew"):
+            queryset = queryset.prefetch_related("crew")
+        return annotate_availability(queryset)
+
+    def list(self, request, *args, **kwargs):
+        with FLIGHT_REQUEST_DURATION.time(action="list"):
+            return self.conditional_response(self.list_rows, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with FLIGHT_REQUEST_DURATION.time(action="retrieve"):
+            return super().retrieve(request, *args, **kwargs)
+
+    def list_rows(self, request, *args, **kwargs):
+        """
+        Same output as ModelViewSet.list with FlightListSerializer, built from
+        values() rows by flight_list_data; only the selected columns are read.
+        """
+        columns, build = compile_shape(FLIGHT_LIST_SHAPE, self.selection)
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            # the cursor of the next page is read from the last row
+            ordering = self.paginator.get_ordering(request, queryset, self)
+            columns = [*columns, *(field.lstrip("-") for field in ordering)]
+        queryset = queryset.values(*dict.fromkeys(columns))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(flight_list_data(page, build))
+
+        return Response(flight_list_data(queryset, build))
+
+    def bulk_saved(self, objs, *, created):
+        # like flight_saved: refresh_flights also bumps the Flight version
+        # (ETags, connection indexes of the other processes)
+        flight_ids = [flight.pk for flight in objs]
+        transaction.on_commit(partial(connection_index.refresh_flights, flight_ids))
+
+    def get_validators(self, request):
+        """
+        Validators of the flights about to be returned, read with a narrow
+        values() query instead of building the page.
+        """
+        versions = get_versions(self.cache_models)
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            rows = list(
+                queryset.filter(pk=self.kwargs["pk"]).values_list("pk", "updated_at", "taken_seats")
+            )
+            if not rows:
+                return None, None
+        else:
+            rows = queryset.values(
+                "id",
+                "updated_at",
+                "departure_time",
+                "arrival_time",
+                "taken_seats",
+                "seats_available",
+            )
+            page = self.paginate_queryset(rows)
+            rows = [
+                (row["id"], row["updated_at"], row["taken_seats"])
+                for row in (page if page is not None else rows)
+            ]
+
+        last_modified = max(
+            [version_to_datetime(max(versions))] + [updated_at for _, updated_at, _ in rows]
+        )
+        return [versions, rows], last_modified
 
     def get_serializer_class(self):
         if self.action == "list":
             return FlightListSerializer
+        if self.action == "seats":
+            return SeatMapSerializer
+        if self.action == "connections":
+            return ConnectionSearchSerializer
         return FlightDetailSerializer
 
+    @action(detail=True, methods=["get"], filter_backends=())
+    def seats(self, request, pk=None):
+        """Seat map of the flight (rows x seats_in_row, "1" - taken)."""
+        return Response(get_seat_map(self.get_object()))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(IsAdminUser,),
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+        content_negotiation_class=ExportContentNegotiation,
+    )
+    def export(self, request):
+        """Flight schedule as NDJSON or CSV (?format=ndjson|csv), list filters apply."""
+        return export_response(
+            self.filter_queryset(self.get_queryset()),
+            {
+                "id": "id",
+                "source": "route__source__name",
+                "destination": "route__destination__name",
+                "departure_time": "departure_time",
+                "arrival_time": "arrival_time",
+                "airplane": "airplane__name",
+                "airplane_type": "airplane__airplane_type__name",
+                "taken_seats": "taken_seats",
+                "seats_available": "seats_available",
+            },
+            export_format=request.accepted_renderer.format,
+            filename="flights",
+        )
+
+    @action(
+        detail=True,
+        methods=["get"],
+        filter_backends=(),
+        permission_classes=(IsAdminUser,),
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+        content_negotiation_class=ExportContentNegotiation,
+    )
+    def manifest(self, request, pk=None):
+        """Passenger/ticket manifest of the flight as NDJSON or CSV."""
+        flight = self.get_object()
+        return export_response(
+            Ticket.objects.filter(flight=flight).order_by("row", "seat"),
+            {
+                "ticket": "id",
+                "row": "row",
+                "seat": "seat",
+                "order": "order_id",
+                "ordered_at": "order__created_at",
+                "username": "order__user__username",
+                "email": "order__user__email",
+            },
+            export_format=request.accepted_renderer.format,
+            filename=f"flight-{flight.pk}-manifest",
+        )
 
-class OrderViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["get"], filter_backends=())
+    def connections(self, request):
+        """
+        Direct and connecting itineraries from one airport to another on a date.
+
+        Served from the in-memory connection index (airport.connections).
+        """
+        params = ConnectionSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        day = data.get("date") or timezone.localdate()
+        start = datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+        end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=start.tzinfo)
+
+        itineraries = search_connections(
+            source_id=data["from"],
+            destination_id=data["to"],
+            start=start,
+            end=end,
+            max_legs=data["max_legs"],
+        )
+        return Response(
+            {
+                "from": data["from"],
+                "to": data["to"],
+                "date": day,
+                "itineraries": [
+                    {
+                        "departure_time": legs[0].departure_time,
+                        "arrival_time": legs[-1].arrival_time,
+                        "duration_minutes": int(
+                            (legs[-1].arrival_time - legs[0].departure_time).total_seconds() // 60
+                        ),
+                        "legs": [
+                            {
+                                "flight": leg.flight_id,
+                                "source": leg.source_id,
+                                "destination": leg.destination_id,
+                                "departure_time": leg.departure_time,
+                                "arrival_time": leg.arrival_time,
+                            }
+                            for leg in legs
+                        ],
+                    }
+                    for legs in itineraries
+                ],
+            }
+        )
+
+
+class FlightScheduleViewSet(viewsets.ModelViewSet):
+    """
+    Recurring flights. Their Flight rows are generated ahead by the
+    materialize_schedules command or the materialize action; editing the
+    pattern regenerates the future ones.
+    """
+    queryset = FlightSchedule.objects.prefetch_related("crew")
+    serializer_class = FlightScheduleSerializer
+    permission_classes = (IsAdminOrReadOnly,)
+
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filterset_fields = ("route", "airplane")
+    ordering_fields = ("valid_from", "valid_until", "departure_time")
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            before = schedule_pattern(serializer.instance)
+            schedule = serializer.save()
+            if schedule_pattern(schedule) != before:
+                reschedule(schedule)
+                schedule.refresh_from_db(fields=["materialized_until"])
+
+    @action(
+        detail=True,
+        methods=["post"],
+        filter_backends=(),
+        serializer_class=MaterializeScheduleSerializer,
+    )
+    def materialize(self, request, pk=None):
+        """Creates the missing flights of the schedule up to "until" (or the rolling window end)."""
+        schedule = self.get_object()
+        params = MaterializeScheduleSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        flights = materialize_schedule(schedule, until=params.validated_data.get("until"))
+        schedule.refresh_from_db(fields=["materialized_until"])
+        return Response(
+            MaterializeScheduleSerializer(
+                {
+                    "created": len(flights),
+                    "materialized_until": schedule.materialized_until,
+                }
+            ).data
+        )
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=ORDER_SPARSE_PARAMETERS),
+    retrieve=extend_schema(parameters=ORDER_SPARSE_PARAMETERS),
+)
+class OrderViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     permission_classes = (IsAuthenticated,)
+    pagination_class = OrderPagination
+    default_expand = ORDER_DEFAULT_EXPAND
+    # ?expand=flight came first
+    expand_aliases = {"flight": "tickets.flight"}
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).prefetch_related("tickets__flight")
+        queryset = Order.objects.filter(user=self.request.user)
+        if not self.selection.includes("tickets"):
+            return queryset
+        # tickets render the flight as its pk, no need to load the flights
+        tickets = Ticket.objects.only("id", "row", "seat", "flight_id", "order_id")
+        queryset = queryset.prefetch_related(Prefetch("tickets", queryset=tickets))
+        if self.selection.renders("tickets.flight"):
+            # one query for the flights of every ticket on the page
+            flights = Flight.objects.select_related("route__source", "route__destination").only(
+                "departure_time",
+                "arrival_time",
+                "route__source__name",
+                "route__destination__name",
+            )
+            queryset = queryset.prefetch_related(Prefetch("tickets__flight", queryset=flights))
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "create":
             return OrderCreateSerializer
         return OrderSerializer
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(IsAdminUser,),
+        renderer_classes=(NDJSONRenderer, CSVRenderer),
+        content_negotiation_class=ExportContentNegotiation,
+    )
+    def export(self, request):
+        """Tickets of all users' orders as NDJSON or CSV (staff only)."""
+        return export_response(
+            Ticket.objects.order_by("order_id", "id"),
+            {
+                "order": "order_id",
+                "ordered_at": "order__created_at",
+                "username": "order__user__username",
+                "email": "order__user__email",
+                "ticket": "id",
+                "flight": "flight_id",
+                "source": "flight__route__source__name",
+                "destination": "flight__route__destination__name",
+                "departure_time": "flight__departure_time",
+                "row": "row",
+                "seat": "seat",
+            },
+            export_format=request.accepted_renderer.format,
+            filename="tickets",
+        )
+
+
+class SeatHoldViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
+    """
+    Seat holds of the current user.
+
+    POST /holds/ holds seats, POST /holds/{token}/confirm/ turns the hold into
+    an order, DELETE /holds/{token}/ releases it.
+    """
+    serializer_class = SeatHoldCreateSerializer
+    permission_classes = (IsAuthenticated,)
+    lookup_field = "token"
+    lookup_value_regex = "[0-9a-f-]{36}"
+
+    def get_holds(self):
+        try:
+            return get_seat_hold(user=self.request.user, token=self.kwargs["token"])
+        except SeatHoldError as e:
+            raise NotFound(str(e)) from e
+
+    def retrieve(self, request, token=None):
+        holds = self.get_holds()
+        return Response(self.get_serializer(seat_hold_data(holds)).data)
+
+    def destroy(self, request, token=None):
+        try:
+            release_seat_hold(user=request.user, token=token)
+        except SeatHoldError as e:
+            raise NotFound(str(e)) from e
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"], serializer_class=OrderSerializer)
+    def confirm(self, request, token=None):
+        self.get_holds()
+        try:
+            order = confirm_seat_hold(user=request.user, token=token)
+        except SeatBookingError as e:
+            raise ValidationError({"seats": str(e)}) from e
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class ResponseCacheStatsView(generics.GenericAPIView):
+    """Hit/miss counters of the reference data response cache (this process)."""
+    serializer_class = ResponseCacheStatsSerializer
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(get_stats())
+
+
+class MetricsView(APIView):
+    """
+    Counters and histograms of airport.metrics, summed over all worker
+    processes, in the Prometheus text exposition format.
+    """
+    # a Prometheus bearer token is not a JWT, see HasMetricsToken
+    authentication_classes = ()
+    permission_classes = (HasMetricsToken,)
+    renderer_classes = (PrometheusRenderer,)
+
+    @extend_schema(responses={200: OpenApiTypes.STR})
+    def get(self, request):
+        return Response(registry.render())
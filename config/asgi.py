@@ -2,11 +2,18 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served by gunicorn with uvicorn workers when DJANGO_SERVER=asgi (see gunicorn.conf.py).
 """
 
 import os
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    # admin / Swagger UI assets in development, as runserver serves them
+    application = ASGIStaticFilesHandler(application)
@@ -1,14 +1,27 @@
 from pathlib import Path
 import os
 from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# development | production, see "Production" in README.md
+DJANGO_ENV = os.getenv("DJANGO_ENV", "development")
+PRODUCTION = DJANGO_ENV == "production"
+
+# wsgi | asgi, the application gunicorn serves (gunicorn.conf.py)
+DJANGO_SERVER = os.getenv("DJANGO_SERVER", "wsgi")
+
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "dev-secret-key")
-DEBUG = os.getenv("DJANGO_DEBUG", "1") == "1"
+# never on in production: it leaks settings in error pages and keeps every query in memory
+DEBUG = not PRODUCTION and os.getenv("DJANGO_DEBUG", "1") == "1"
+
+if PRODUCTION and SECRET_KEY in ("dev-secret-key", "replace-me"):
+    raise ImproperlyConfigured("Set DJANGO_SECRET_KEY when DJANGO_ENV=production.")
 
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "127.0.0.1,localhost").split(",")
 
@@ -32,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so it sees the queries of every other middleware
+    "airport.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -81,6 +96,31 @@ else:
         }
     }
 
+# Persistent connections: a connection is reused for up to DJANGO_CONN_MAX_AGE seconds
+# instead of being opened per request, and checked before reuse. Only for WSGI workers:
+# under ASGI connections are per request context and would never be reused nor closed.
+DATABASES["default"]["CONN_MAX_AGE"] = int(
+    os.getenv("DJANGO_CONN_MAX_AGE", "60" if PRODUCTION and DJANGO_SERVER == "wsgi" else "0")
+)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# locmem is per process; use "file" (or a shared backend) with several workers, gunicorn
+# defaults to "file" when it starts more than one (gunicorn.conf.py)
+CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "file" if PRODUCTION else "locmem")
+if CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", str(BASE_DIR / ".cache")),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -100,7 +140,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.MeteredJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -123,3 +163,76 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
+
+# Airport app
+AIRPORT_SEAT_MAP_CACHE_TIMEOUT = int(os.getenv("AIRPORT_SEAT_MAP_CACHE_TIMEOUT", "60"))
+AIRPORT_SEAT_HOLD_MINUTES = int(os.getenv("AIRPORT_SEAT_HOLD_MINUTES", "10"))
+AIRPORT_RESPONSE_CACHE_TIMEOUT = int(os.getenv("AIRPORT_RESPONSE_CACHE_TIMEOUT", "3600"))
+
+AIRPORT_CONNECTION_INDEX_TTL = int(os.getenv("AIRPORT_CONNECTION_INDEX_TTL", "300"))
+AIRPORT_MIN_CONNECTION_MINUTES = int(os.getenv("AIRPORT_MIN_CONNECTION_MINUTES", "45"))
+AIRPORT_MAX_CONNECTION_HOURS = int(os.getenv("AIRPORT_MAX_CONNECTION_HOURS", "24"))
+
+# none | row | advisory, see airport.services.lock_flight
+AIRPORT_BOOKING_LOCK = os.getenv("AIRPORT_BOOKING_LOCK", "none")
+AIRPORT_BOOKING_RETRIES = int(os.getenv("AIRPORT_BOOKING_RETRIES", "0"))
+AIRPORT_BOOKING_RETRY_BACKOFF = float(os.getenv("AIRPORT_BOOKING_RETRY_BACKOFF", "0.05"))
+
+# list payloads of the /bulk/ endpoints, see airport.bulk
+AIRPORT_BULK_MAX_ITEMS = int(os.getenv("AIRPORT_BULK_MAX_ITEMS", "5000"))
+AIRPORT_BULK_BATCH_SIZE = int(os.getenv("AIRPORT_BULK_BATCH_SIZE", "1000"))
+
+# days ahead FlightSchedule flights are generated for, see airport.schedules
+AIRPORT_SCHEDULE_WINDOW_DAYS = int(os.getenv("AIRPORT_SCHEDULE_WINDOW_DAYS", "60"))
+
+# ?wait= of the async seat map endpoint, see airport.async_views
+AIRPORT_LONG_POLL_SECONDS = int(os.getenv("AIRPORT_LONG_POLL_SECONDS", "30"))
+AIRPORT_LONG_POLL_INTERVAL = float(os.getenv("AIRPORT_LONG_POLL_INTERVAL", "1"))
+
+# request instrumentation, see airport.middleware
+AIRPORT_SERVER_TIMING = os.getenv("AIRPORT_SERVER_TIMING", "0" if PRODUCTION else "1") == "1"
+AIRPORT_QUERY_BUDGET_STRICT = os.getenv("AIRPORT_QUERY_BUDGET_STRICT", "0") == "1"
+# SQL queries per request (authentication included); {"queries": n, "ms": total} also works
+AIRPORT_QUERY_BUDGETS = {
+    "flight-list": 3,
+    "flight-detail": 4,
+    "flight-seats": 3,
+    "flight-connections": 2,
+    "async-flight-search": 3,
+    "async-flight-seats": 2,
+    "airport-list": 2,
+    "route-list": 2,
+    "airplanetype-list": 2,
+    "airplane-list": 2,
+    "crew-list": 2,
+    "orders-list": 4,
+    # + the active holds re-check of a booking without a lock (airport.services)
+    "POST orders-list": 10,
+    "POST holds-list": 10,
+    "holds-detail": 2,
+}
+
+# /metrics, see airport.metrics; gunicorn.conf.py sets the directory for its workers
+AIRPORT_METRICS_DIR = os.getenv("AIRPORT_METRICS_DIR", "")
+AIRPORT_METRICS_FLUSH_SECONDS = float(os.getenv("AIRPORT_METRICS_FLUSH_SECONDS", "1"))
+# empty: /metrics is open (not allowed in production), otherwise scrape with
+# "Authorization: Bearer <token>"
+AIRPORT_METRICS_TOKEN = os.getenv("AIRPORT_METRICS_TOKEN", "")
+if PRODUCTION and not AIRPORT_METRICS_TOKEN:
+    raise ImproperlyConfigured("Set AIRPORT_METRICS_TOKEN when DJANGO_ENV=production.")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # one JSON object per request; INFO logs all of them, WARNING only budget overruns
+        "airport.requests": {
+            "handlers": ["console"],
+            "level": os.getenv("AIRPORT_REQUEST_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
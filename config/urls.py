@@ -3,6 +3,8 @@ from django.urls import path, include
 
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from airport.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
 
@@ -10,6 +12,9 @@ urlpatterns = [
     path("api/accounts/", include("accounts.urls")),
     path("api/", include("airport.urls")),
 
+    # Monitoring
+    path("metrics", MetricsView.as_view(), name="metrics"),
+
     # Docs
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
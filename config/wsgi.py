@@ -2,11 +2,18 @@
 WSGI config for config project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Served in production by gunicorn (see gunicorn.conf.py).
 """
 
 import os
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+if settings.DEBUG:
+    # admin / Swagger UI assets in development, as runserver serves them
+    application = StaticFilesHandler(application)
@@ -0,0 +1,69 @@
+"""
+Gunicorn configuration, read from the working directory by a plain `gunicorn`.
+
+DJANGO_SERVER=wsgi (default): threaded sync workers. Each thread keeps its
+database connection between requests (DJANGO_CONN_MAX_AGE), so at most
+workers x threads connections are open.
+
+DJANGO_SERVER=asgi: uvicorn workers for many concurrent long polls (see
+airport.async_views). Connections are per request there, pool them with
+pgbouncer.
+
+With more than one worker the cache defaults to the file backend: cache
+versions, seat map invalidations and long poll wakeups must reach every
+worker, a locmem cache is per process.
+"""
+import multiprocessing
+import os
+import tempfile
+from pathlib import Path
+
+server = os.getenv("DJANGO_SERVER", "wsgi")
+if server == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "config.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+if workers > 1:
+    # read by config.settings in every worker
+    if os.environ.setdefault("DJANGO_CACHE_BACKEND", "file") == "locmem":
+        raise RuntimeError(
+            "DJANGO_CACHE_BACKEND=locmem is per process, use file with WEB_CONCURRENCY > 1."
+        )
+
+# above AIRPORT_LONG_POLL_SECONDS, or long polls get their worker killed
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# recycle workers now and then, so slow leaks cannot grow without bound
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-" if os.getenv("GUNICORN_ACCESS_LOG", "0") == "1" else None
+errorlog = "-"
+
+# every worker dumps its metrics here, /metrics adds them up (airport.metrics)
+metrics_dir = Path(
+    os.environ.setdefault(
+        "AIRPORT_METRICS_DIR", os.path.join(tempfile.gettempdir(), "airport-metrics")
+    )
+)
+
+
+def on_starting(arbiter):
+    # counters of a previous run must not be added to this one
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    for path in metrics_dir.glob("*.json"):
+        path.unlink()
+
+
+def child_exit(arbiter, worker):
+    from airport.metrics import archive_process
+
+    archive_process(metrics_dir, worker.pid)